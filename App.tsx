@@ -33,6 +33,7 @@ import KakaoInquiryButton from './components/KakaoInquiryButton';
 import RankingTracker from './components/RankingTracker';
 import { generateTopicsFromMainKeyword, generateTopicsFromAllKeywords, generateBlogStrategy, fetchRecommendedKeywords, generateSustainableTopics, generateSerpStrategy, executePromptAsCompetitionAnalysis, generateBlogPost, generateTrendBlogPost } from './services/keywordService';
 import { searchNaverKeywords, analyzeNaverCompetition, downloadExcel } from './services/naverKeywordService';
+import type { AnalysisProgress } from './services/naverKeywordService';
 import type { SearchSource, Feature, KeywordData, BlogPostData, KeywordMetrics, GeneratedTopic, BlogStrategyReportData, RecommendedKeyword, SustainableTopicCategory, GoogleSerpData, SerpStrategyReportData, PaaItem, NaverKeywordData } from './types';
 import NaverKeywordAnalysis from './components/NaverKeywordAnalysis';
 import { config } from './src/config/appConfig';
@@ -84,6 +85,7 @@ const App: React.FC = () => {
     const [naverKeywordsLoading, setNaverKeywordsLoading] = useState<boolean>(false);
     const [naverKeywordsError, setNaverKeywordsError] = useState<string | null>(null);
     const [naverAnalyzing, setNaverAnalyzing] = useState<boolean>(false);
+    const [naverAnalysisProgress, setNaverAnalysisProgress] = useState<AnalysisProgress | null>(null);
     const [naverExcelFilename, setNaverExcelFilename] = useState<string>('');
 
     const [blogPost, setBlogPost] = useState<{ title: string; content: string; format: 'html' | 'markdown' | 'text'; platform: 'naver' | 'google'; schemaMarkup?: string; htmlPreview?: string; metadata?: { keywords: string; imagePrompt: string; seoTitles: string[] } } | null>(null);
@@ -1079,12 +1081,14 @@ const App: React.FC = () => {
         if (!keywordsToAnalyze || keywordsToAnalyze.length === 0) return;
 
         setNaverAnalyzing(true);
+        setNaverAnalysisProgress(null);
         setNaverKeywordsError(null);
 
         try {
             console.log('[DEBUG] 경쟁도 분석 시작:', keywordsToAnalyze.length, '개 키워드');
 
-            const result = await analyzeNaverCompetition(keywordsToAnalyze);
+            // 진행률은 서버의 SSE 스트림으로 받음
+            const result = await analyzeNaverCompetition(keywordsToAnalyze, setNaverAnalysisProgress);
 
             console.log('[DEBUG] 경쟁도 분석 완료:', result);
 
@@ -1128,6 +1132,7 @@ const App: React.FC = () => {
             }
         } finally {
             setNaverAnalyzing(false);
+            setNaverAnalysisProgress(null);
         }
     };
 
@@ -2148,6 +2153,7 @@ const App: React.FC = () => {
                                                     filename={naverExcelFilename}
                                                     onAnalyzeCompetition={handleNaverAnalyzeCompetition}
                                                     analyzing={naverAnalyzing}
+                                                    progress={naverAnalysisProgress}
                                                 />
                                             )}
 
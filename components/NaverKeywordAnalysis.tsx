@@ -1,5 +1,6 @@
 import React, { useState, useMemo } from 'react';
 import type { NaverKeywordData } from '../types';
+import type { AnalysisProgress } from '../services/naverKeywordService';
 
 interface NaverKeywordAnalysisProps {
   data: NaverKeywordData[];
@@ -7,12 +8,13 @@ interface NaverKeywordAnalysisProps {
   filename?: string;
   onAnalyzeCompetition?: (keywords: NaverKeywordData[]) => void;
   analyzing?: boolean;
+  progress?: AnalysisProgress | null;
 }
 
 type SortField = 'keyword' | 'mobile' | 'pc' | 'total' | 'competition' | 'docCount' | 'ratio';
 type SortDirection = 'asc' | 'desc' | null;
 
-const NaverKeywordAnalysis: React.FC<NaverKeywordAnalysisProps> = ({ data, onDownload, filename, onAnalyzeCompetition, analyzing }) => {
+const NaverKeywordAnalysis: React.FC<NaverKeywordAnalysisProps> = ({ data, onDownload, filename, onAnalyzeCompetition, analyzing, progress }) => {
   const [sortField, setSortField] = useState<SortField | null>(null);
   const [sortDirection, setSortDirection] = useState<SortDirection>(null);
   const [deletedKeywords, setDeletedKeywords] = useState<Set<string>>(new Set());
@@ -317,7 +319,9 @@ const NaverKeywordAnalysis: React.FC<NaverKeywordAnalysisProps> = ({ data, onDow
                     <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4"></circle>
                     <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
                   </svg>
-                  <span>경쟁 분석 중...</span>
+                  <span>
+                    경쟁 분석 중...{progress && progress.total > 0 ? ` (${progress.current}/${progress.total})` : ''}
+                  </span>
                 </>
               ) : (
                 <>
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+회로 차단기(circuit breaker) 모듈
+외부 API/크롤링 대상마다 하나씩 두고, 연속으로 실패하면 잠시 호출을 막아서
+장애 중인 대상 때문에 요청이 타임아웃까지 기다리거나 워커 스레드를 붙잡지 않도록 함
+- closed: 정상 호출, 연속 실패가 BREAKER_FAILURE_THRESHOLD회가 되면 open
+- open: 호출하지 않고 바로 CircuitOpen 발생, BREAKER_RESET_TIMEOUT초 후 half_open
+- half_open: 시험 호출 하나만 허용, 성공하면 closed / 실패하면 다시 open
+"""
+import os
+import threading
+import time
+
+import requests
+
+from upstream import DeadlineExceeded, UpstreamError
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+
+
+class CircuitOpen(UpstreamError):
+    """회로가 열려 있어서 호출하지 않음"""
+
+
+def is_upstream_failure(error):
+    """
+    대상 장애로 볼 오류인지 - 연결 오류, 5xx
+    (400 등 요청 자체의 문제는 대상이 정상이므로 실패로 세지 않음,
+     429는 호출 제한/키 풀이 속도를 낮추고 다른 키로 넘기므로 차단하지 않음)
+    """
+    if isinstance(error, requests.RequestException):
+        return True
+    status = getattr(error, 'status', None)
+    return status is not None and status >= 500
+
+
+class CircuitBreaker:
+    """
+    대상 하나의 회로 차단기 (스레드 안전)
+    is_failure(error)가 True인 예외만 실패로 셈 (기본: 모든 예외)
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT,
+                 is_failure=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure or (lambda error: True)
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.successes = 0
+        self.rejected = 0
+        self.opened = 0
+        self.opened_at = None
+        self.last_error = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpen(f'{self.name} 일시 차단 중 (최근 오류: {self.last_error})')
+                self.state = 'half_open'
+                self._trial = False
+            if self.state == 'half_open':
+                if self._trial:
+                    self.rejected += 1
+                    raise CircuitOpen(f'{self.name} 복구 확인 중')
+                self._trial = True
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        print(f"[WARNING] {self.name} 회로 차단 ({self.reset_timeout:.0f}초): {self.last_error}")
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self._trial = False
+            if self.state != 'closed':
+                print(f"[INFO] {self.name} 회로 복구")
+            self.state = 'closed'
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            self._trial = False
+            # 이미 열려 있을 때 끝난 호출의 실패는 차단 시간을 늘리지 않음
+            if self.state == 'half_open' or (self.state == 'closed' and
+                                             self.consecutive_failures >= self.failure_threshold):
+                self._open()
+
+    def call(self, fn):
+        """fn() 실행 - 회로가 열려 있으면 호출하지 않고 CircuitOpen"""
+        self._before_call()
+        try:
+            result = fn()
+        except DeadlineExceeded:
+            # 요청 쪽 마감 때문에 중단된 호출은 대상 상태와 무관
+            with self._lock:
+                self._trial = False
+            raise
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(e)
+            else:
+                # 대상은 응답했으므로 시험 호출이었다면 복구로 봄
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def reset(self):
+        """관리자용 - 강제로 closed"""
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self._trial = False
+
+    def stats(self):
+        with self._lock:
+            retry_in = None
+            if self.state == 'open':
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            return {
+                'state': self.state,
+                'consecutiveFailures': self.consecutive_failures,
+                'failures': self.failures,
+                'successes': self.successes,
+                'rejected': self.rejected,
+                'opened': self.opened,
+                'retryIn': retry_in,
+                'lastError': self.last_error
+            }
+
+
+class BreakerRegistry:
+    """이름 → CircuitBreaker (처음 쓸 때 생성)"""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, **kwargs):
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, **kwargs)
+            return breaker
+
+    def find(self, name):
+        with self._lock:
+            return self._breakers.get(name)
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.stats() for name, breaker in breakers.items()}
+
+
+breakers = BreakerRegistry()
+
+# 외부 API 차단기 (연결 오류, 5xx만 실패로 셈)
+keywordstool_breaker = breakers.get('keywordstool', is_failure=is_upstream_failure)
+blog_search_breaker = breakers.get('blog_search', is_failure=is_upstream_failure)
+news_search_breaker = breakers.get('news_search', is_failure=is_upstream_failure)
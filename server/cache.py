@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+프로세스 내 캐시 모듈
+TTL(유효시간) + LRU(최근 사용 순) 방식으로 크기를 제한하는 캐시
+그 밖에 결과 목록 지문(fingerprint)으로 같은 결과의 재처리를 건너뛰는 메모
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    크기 제한 + 유효시간이 있는 LRU 캐시 (스레드 안전)
+
+    Args:
+        maxsize: 최대 항목 수 (초과 시 가장 오래 사용하지 않은 항목부터 제거)
+        ttl: 항목 유효시간(초)
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """유효한 값이 있으면 반환, 없거나 만료됐으면 default 반환"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return default
+
+    def get_stale(self, key, default=None):
+        """
+        만료 여부와 관계없이 마지막으로 저장한 값 (원본 조회가 실패했을 때의 대체값)
+        만료된 항목도 LRU로 밀려날 때까지는 남아 있음
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            self.fallbacks += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """캐시 적중 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'fallbacks': self.fallbacks,
+                'hit_ratio': round(self.hits / total, 4) if total else 0
+            }
+
+
+class StaleWhileRevalidateCache:
+    """
+    stale-while-revalidate 캐시 (스레드 안전)
+    - ttl 이내: 캐시된 값을 바로 반환
+    - ttl 경과 ~ stale_ttl 이내: 이전 값을 바로 반환하고 백그라운드에서 갱신
+    - stale_ttl 경과 또는 없음: 그 자리에서 loader 호출
+      (loader가 실패하면 stale_ttl이 지난 값이라도 마지막 값을 반환)
+
+    Args:
+        maxsize: 최대 항목 수 (LRU 방식으로 제거)
+        ttl: 신선한 값으로 보는 시간(초)
+        stale_ttl: 만료된 값을 계속 내줄 수 있는 최대 시간(초)
+    """
+
+    def __init__(self, maxsize, ttl, stale_ttl):
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self.stale_ttl = max(float(stale_ttl), self.ttl)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.fallbacks = 0
+        self._data = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _store(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _refresh(self, key, loader):
+        try:
+            self._store(key, loader())
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+            print(f"[WARNING] 캐시 백그라운드 갱신 실패 ({key}): {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key, loader):
+        """
+        캐시된 값 반환, 없으면 loader()로 불러와 저장
+        loader는 인자 없이 호출되는 함수
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.stale_ttl:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                    return value
+            self.misses += 1
+
+        try:
+            value = loader()
+        except Exception:
+            if entry is None:
+                raise
+            # 원본이 실패하면 오래된 값이라도 마지막으로 받은 값 사용
+            with self._lock:
+                self.fallbacks += 1
+            print(f"[WARNING] 캐시 원본 조회 실패, 마지막 값 사용 ({key})")
+            return entry[0]
+        self._store(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """캐시 적중 통계"""
+        with self._lock:
+            total = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'fallbacks': self.fallbacks,
+                'hit_ratio': round((self.hits + self.stale_hits) / total, 4) if total else 0
+            }
+
+
+def fingerprint(parts):
+    """순서가 있는 결과 목록(링크, 본문 등)의 짧은 지문 (16자리 hex)"""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+class ResultMemo:
+    """
+    결과 지문 메모 (스레드 안전, LRU 방식으로 크기 제한)
+    같은 키로 받은 결과 목록의 지문이 지난번과 같으면 compute(파싱, 매칭 등)를 건너뛰고 지난번 결과 재사용
+
+    Args:
+        maxsize: 최대 키 수
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = int(maxsize)
+        self.reused = 0
+        self.processed = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reuse(self, key, parts, compute):
+        """
+        (결과, 재사용 여부) 반환
+        parts: 결과 목록 (순서 포함해서 비교), compute: 인자 없이 결과를 만드는 함수
+        """
+        current = fingerprint(parts)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == current:
+                self._data.move_to_end(key)
+                self.reused += 1
+                return entry[1], True
+            self.processed += 1
+
+        value = compute()
+        with self._lock:
+            self._data[key] = (current, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value, False
+
+    def stats(self):
+        """재사용 통계"""
+        with self._lock:
+            total = self.reused + self.processed
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'reused': self.reused,
+                'processed': self.processed,
+                'reuse_ratio': round(self.reused / total, 4) if total else 0
+            }
+
+
+def normalize_keyword(keyword):
+    """캐시 키용 키워드 정규화 (앞뒤 공백 제거, 연속 공백 하나로, 소문자)"""
+    return ' '.join(str(keyword).split()).lower()
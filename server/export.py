@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+분석 결과 내보내기 모듈
+분석이 끝나면 결과 행만 보관해두고, 파일은 /download 요청이 왔을 때(또는 백그라운드에서) 생성
+- xlsx: openpyxl write-only 모드로 한 줄씩 기록 (행 수와 관계없이 메모리 일정)
+- csv: 엑셀에서 한글이 깨지지 않도록 utf-8-sig
+- parquet: pandas + pyarrow가 설치된 경우에만 지원
+"""
+import csv
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from cache import TTLCache
+
+EXPORT_COLUMNS = ['연관키워드', '모바일검색량', 'PC검색량', '총검색량', '경쟁강도', '총문서수', '경쟁률']
+
+EXPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+# 생성한 파일을 두는 폴더
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'keyword_exports'))
+
+# 분석 결과를 내보내기용으로 보관하는 시간(초)과 개수
+EXPORT_RETENTION = float(os.getenv('EXPORT_RETENTION', '3600'))
+EXPORT_CACHE_SIZE = int(os.getenv('EXPORT_CACHE_SIZE', '200'))
+
+# 1이면 분석이 끝나자마자 백그라운드에서 xlsx를 미리 생성
+EXPORT_PREWARM = os.getenv('EXPORT_PREWARM', '0') == '1'
+
+
+def _values(row, missing=''):
+    """
+    내보낼 열 값 목록 - 조회에 실패한 총문서수/경쟁률(None)은 missing
+    (xlsx/csv는 빈 칸, parquet는 숫자 열이 깨지지 않도록 None 그대로)
+    """
+    values = []
+    for column in EXPORT_COLUMNS:
+        value = row.get(column, '')
+        if value is None:
+            value = missing
+        elif isinstance(value, float) and not math.isfinite(value):
+            # 총문서수 0인 경우의 inf/NaN 경쟁률 등은 0으로 기록
+            value = 0
+        values.append(value)
+    return values
+
+
+def write_xlsx(rows, path):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("키워드 분석")
+    ws.append(EXPORT_COLUMNS)
+    for row in rows:
+        ws.append(_values(row))
+    wb.save(path)
+
+
+def write_csv(rows, path):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            writer.writerow(_values(row))
+
+
+def write_parquet(rows, path):
+    try:
+        import pandas as pd
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError('parquet 내보내기에는 pandas, pyarrow 설치가 필요합니다.')
+
+    pd.DataFrame([_values(row, missing=None) for row in rows], columns=EXPORT_COLUMNS).to_parquet(path, index=False)
+
+
+WRITERS = {'xlsx': write_xlsx, 'csv': write_csv, 'parquet': write_parquet}
+
+
+class ExportRegistry:
+    """
+    파일 이름(확장자 제외) → 분석 결과 행 보관소
+    같은 결과를 확장자만 바꿔서 xlsx / csv / parquet 로 받을 수 있음
+    보관 기간이 지난 결과의 파일은 다운로드 요청/새 결과 등록 때 삭제
+    """
+
+    def __init__(self, export_dir=EXPORT_DIR, retention=EXPORT_RETENTION, maxsize=EXPORT_CACHE_SIZE):
+        self.export_dir = export_dir
+        self.retention = retention
+        self._rows = TTLCache(maxsize=maxsize, ttl=retention)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, rows, export_id, prefix='키워드분석'):
+        """결과 행을 등록하고 다운로드용 xlsx 파일 이름 반환 (파일은 아직 만들지 않음)"""
+        now = datetime.now()
+        stem = f'{prefix}_{now.strftime("%Y%m%d_%H%M%S")}_{export_id[:8]}'
+        self._rows.set(stem, rows)
+        self.prune()
+        filename = f'{stem}.xlsx'
+        if EXPORT_PREWARM:
+            threading.Thread(target=self.path_for, args=(filename,), daemon=True).start()
+        return filename
+
+    def path_for(self, filename):
+        """
+        다운로드할 파일 경로 - 아직 없으면 이 자리에서 생성
+        등록되지 않은(또는 보관 기간이 지난) 이름이면 None
+        """
+        filename = os.path.basename(filename)
+        stem, ext = os.path.splitext(filename)
+        fmt = ext.lstrip('.').lower()
+        if fmt not in EXPORT_FORMATS:
+            return None
+
+        path = os.path.join(self.export_dir, filename)
+        rows = self._rows.get(stem)
+        if rows is None:
+            # 보관 기간이 지났으면 만들어 둔 파일도 삭제
+            self._remove(stem)
+            return None
+
+        with self._lock:
+            lock = self._locks.setdefault(filename, threading.Lock())
+
+        # 같은 파일을 동시에 두 번 만들지 않도록 파일별 잠금
+        with lock:
+            if os.path.exists(path):
+                return path
+
+            os.makedirs(self.export_dir, exist_ok=True)
+            tmp_path = path + '.tmp'
+            WRITERS[fmt](rows, tmp_path)
+            os.replace(tmp_path, path)
+            print(f"[INFO] 내보내기 파일 생성: {filename} ({len(rows)}행)")
+            return path
+
+    def _remove(self, stem):
+        """결과 하나의 모든 형식 파일과 파일별 잠금 삭제"""
+        for fmt in EXPORT_FORMATS:
+            filename = f'{stem}.{fmt}'
+            try:
+                os.remove(os.path.join(self.export_dir, filename))
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._locks.pop(filename, None)
+
+    def prune(self):
+        """보관 기간이 지난 파일(이전 실행에서 만든 파일 포함)과 쓰지 않는 파일별 잠금 정리"""
+        cutoff = time.time() - self.retention
+        try:
+            names = os.listdir(self.export_dir)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            path = os.path.join(self.export_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+        with self._lock:
+            for filename, lock in list(self._locks.items()):
+                if not lock.locked() and not os.path.exists(os.path.join(self.export_dir, filename)):
+                    del self._locks[filename]
+
+
+export_registry = ExportRegistry()
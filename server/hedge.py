@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+지연 대비 중복 요청(hedged request) 모듈
+검색 API 호출이 최근 응답 시간의 HEDGE_PERCENTILE 백분위수 안에 끝나지 않으면
+같은 호출을 한 번 더 보내고, 먼저 도착한 응답을 사용 (느린 호출 하나가 분석 전체를 붙잡지 않도록)
+- 중복 호출은 일반 호출 수 x HEDGE_BUDGET_RATIO까지만 허용 (API 사용량이 크게 늘지 않도록)
+- 응답 시간은 HTTP 호출만 기록 (호출 제한 대기 시간 제외), 중복 호출도 호출 제한을 지킴
+- 첫 호출은 호출하는 스레드에서 그대로 실행하고, 중복 호출만 작업 스레드에서 실행
+  (작업 스레드 대기 시간이 중복 호출 대기 시간에 섞이지 않도록)
+- 진 쪽 호출은 마감 시간을 즉시 만료시켜서 아직 보내지 않았으면 보내지 않고,
+  이미 보냈으면 연결을 끊어서 응답을 기다리지 않음
+- HEDGE_ENABLED=1 일 때만 사용
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from upstream import CallHandle, Deadline, call_scope, current_deadline, deadline_scope
+
+HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', '0') == '1'
+
+# 이 백분위수의 응답 시간이 지나도 응답이 없으면 중복 호출
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '95'))
+
+# 응답 시간 기록 개수, 중복 호출을 시작하기 위한 최소 기록 수, 최소 대기 시간(초)
+HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', '200'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', '0.05'))
+
+# 중복 호출 한도 - 호출 하나마다 HEDGE_BUDGET_RATIO만큼 쌓이고 (최대 HEDGE_BUDGET_BURST), 중복 호출 하나에 1 사용
+HEDGE_BUDGET_RATIO = float(os.getenv('HEDGE_BUDGET_RATIO', '0.05'))
+HEDGE_BUDGET_BURST = float(os.getenv('HEDGE_BUDGET_BURST', '5'))
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('HEDGE_WORKERS', '32')), thread_name_prefix='hedge')
+
+
+class _Scheduler:
+    """정해진 시각에 함수를 실행하는 스레드 하나 (호출마다 타이머 스레드를 만들지 않도록)"""
+
+    def __init__(self):
+        self._queue = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def call_at(self, when, fn):
+        with self._cond:
+            heapq.heappush(self._queue, (when, next(self._order), fn))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='hedge-scheduler', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    self._cond.wait(self._queue[0][0] - time.monotonic() if self._queue else None)
+                _, _, fn = heapq.heappop(self._queue)
+            try:
+                fn()
+            except Exception as e:
+                print(f"[WARNING] 중복 호출 예약 실행 실패: {str(e)}")
+
+
+_scheduler = _Scheduler()
+
+
+class _HedgedCall:
+    """호출 하나의 첫 호출/중복 호출 상태"""
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.primary = CallHandle()
+        self.primary_done = False
+        self.winner = None
+        self.hedge = None
+        self.lock = threading.Lock()
+
+
+class Hedger:
+    """
+    호출 하나에 중복 호출을 최대 한 번 보내는 실행기 (스레드 안전)
+    fn은 같은 결과를 돌려주는 멱등(idempotent) 호출이어야 함
+    """
+
+    def __init__(self, name, percentile=HEDGE_PERCENTILE, window=HEDGE_WINDOW, enabled=HEDGE_ENABLED):
+        self.name = name
+        self.percentile = percentile
+        self.enabled = enabled
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.budget_exhausted = 0
+        self._latencies = deque(maxlen=window)
+        self._tokens = HEDGE_BUDGET_BURST
+        self._lock = threading.Lock()
+
+    def _record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self):
+        """중복 호출까지 기다릴 시간(초) - 기록이 부족하면 None"""
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(HEDGE_MIN_DELAY, latencies[index])
+
+    def _take_budget(self):
+        with self._lock:
+            if self._tokens < 1:
+                self.budget_exhausted += 1
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    def _launch_hedge(self, state, fn, prepare):
+        """delay()초가 지나도 첫 호출이 끝나지 않았으면 중복 호출을 작업 스레드에 보냄 (예약 스레드에서 실행)"""
+        with state.lock:
+            if state.primary_done or not self._take_budget():
+                return
+            remaining = state.parent.remaining() if state.parent is not None else float('inf')
+            deadline = Deadline(remaining)
+            state.hedge = (deadline, _executor.submit(self._run_hedge, state, deadline, fn, prepare))
+
+    def _run_hedge(self, state, deadline, fn, prepare):
+        """
+        중복 호출 (취소할 수 있도록 요청 마감 시간을 복사한 별도 마감 시간으로 실행)
+        prepare()는 fn() 전에 실행 (호출 제한 대기 등 - 응답 시간에는 넣지 않음)
+        """
+        with deadline_scope(deadline):
+            if prepare is not None:
+                prepare()
+            started = time.monotonic()
+            result = fn()
+        self._record(time.monotonic() - started)
+        with state.lock:
+            won = state.winner is None
+            if won:
+                state.winner = 'hedge'
+        if won:
+            # 첫 호출은 응답을 기다리지 않고 연결을 끊음
+            state.primary.abort()
+        return result
+
+    def call(self, fn, prepare=None):
+        """
+        fn() 실행 - delay()초 안에 끝나지 않으면 한 번 더 보내고 먼저 성공한 결과 반환
+        첫 호출은 호출하는 스레드에서 실행하고, 중복 호출만 작업 스레드에서 실행
+        prepare는 중복 호출 직전에만 실행 (첫 호출의 준비는 호출하는 쪽에서 끝낸 상태)
+        """
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(HEDGE_BUDGET_BURST, self._tokens + HEDGE_BUDGET_RATIO)
+
+        delay = self.delay() if self.enabled else None
+        if delay is None:
+            started = time.monotonic()
+            result = fn()
+            self._record(time.monotonic() - started)
+            return result
+
+        state = _HedgedCall(current_deadline())
+        _scheduler.call_at(time.monotonic() + delay, lambda: self._launch_hedge(state, fn, prepare))
+
+        error = None
+        started = time.monotonic()
+        try:
+            with call_scope(state.primary):
+                result = fn()
+        except Exception as e:
+            error = e
+        else:
+            self._record(time.monotonic() - started)
+
+        with state.lock:
+            state.primary_done = True
+            hedge = state.hedge
+            if error is None and state.winner is None:
+                state.winner = 'primary'
+            winner = state.winner
+
+        if error is None:
+            if hedge is not None:
+                # 중복 호출은 취소 (이미 보냈으면 응답을 받은 뒤 버림)
+                hedge[1].cancel()
+                hedge[0].cancel()
+                with self._lock:
+                    if winner == 'primary':
+                        self.primary_wins += 1
+                    else:
+                        self.hedge_wins += 1
+            return result
+
+        if hedge is None:
+            raise error
+        # 첫 호출이 실패했거나 중복 호출이 먼저 성공해서 끊김 - 중복 호출 결과 사용
+        try:
+            result = hedge[1].result()
+        except Exception:
+            raise error
+        with self._lock:
+            self.hedge_wins += 1
+        return result
+
+    def stats(self):
+        delay = self.delay()
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'percentile': self.percentile,
+                'delayMs': round(delay * 1000, 1) if delay is not None else None,
+                'samples': len(self._latencies),
+                'calls': self.calls,
+                'hedged': self.hedged,
+                'hedgeWins': self.hedge_wins,
+                'primaryWins': self.primary_wins,
+                'budgetExhausted': self.budget_exhausted,
+                'hedgeRatio': round(self.hedged / self.calls, 4) if self.calls else 0
+            }
+
+
+# 블로그 총문서수 조회 (display=1), 순위 확인용 블로그 검색 (display=100) - 응답 시간이 달라서 따로 기록
+blog_total_hedger = Hedger('blog_total')
+blog_search_hedger = Hedger('blog_search')
+hedgers = {hedger.name: hedger for hedger in (blog_total_hedger, blog_search_hedger)}
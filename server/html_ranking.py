@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+검색 결과 HTML 기반 블로그 순위 확인 모듈 (test-api-directly.py 방식)
+- m.search.naver.com 통합검색 / 블로그 탭 페이지를 동시에 요청 (공용 연결 풀 사용)
+- 응답을 통째로 받지 않고 조각(chunk) 단위로 읽으면서 블로그 링크를 추출
+- 대상 링크를 찾거나 확인할 순위(통합검색 30위, 블로그 탭 100위)에 도달하면 더 읽지 않고 연결을 닫음
+"""
+import os
+import re
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from ranking import area_ranks, normalize_url, parse_post_id
+from upstream import bind_deadline, current_deadline, http_client
+
+MAIN_SEARCH_URL = 'https://m.search.naver.com/search.naver'
+
+MOBILE_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 '
+                   '(KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7'
+}
+
+HTML_RANKING_TIMEOUT = float(os.getenv('HTML_RANKING_TIMEOUT', '10'))
+
+# 통합검색은 30위(스마트블록 10 + 블로그 영역 20), 블로그 탭은 100위까지 확인
+MAIN_CUTOFF = 30
+BLOG_TAB_CUTOFF = 100
+
+CHUNK_SIZE = 16 * 1024
+
+# 링크 최대 길이 - 조각 경계에 걸친 링크를 놓치지 않도록 이만큼은 다음 조각과 이어서 검사
+MAX_LINK_LENGTH = 500
+_BLOG_LINK_RE = re.compile(rb'https?://(?:m\.)?blog\.naver\.com/[^"\'<>\s\\]{1,%d}' % MAX_LINK_LENGTH)
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('HTML_RANKING_WORKERS', '8')),
+                               thread_name_prefix='html-ranking')
+
+
+def _link_key(link):
+    """
+    같은 글의 중복 링크를 하나로 세기 위한 키 - 글이 아닌 링크(블로그 홈 등)는 None
+    글 식별자가 있으면 식별자, 없으면 쿼리를 뺀 주소
+    """
+    post_id = parse_post_id(link)
+    if post_id:
+        return post_id
+    path = urllib.parse.urlsplit(link).path
+    if '/PostList.naver' in link:
+        return link.lower()
+    if len([segment for segment in path.split('/') if segment]) >= 2:
+        return normalize_url(link)
+    return None
+
+
+def iter_blog_links(chunks):
+    """
+    HTML 조각들에서 블로그 글 링크를 등장 순서대로 (중복 제거) 내보내는 generator
+    조각 경계에 걸친 링크는 다음 조각과 이어 붙여서 검사
+    """
+    seen = set()
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        # 뒤쪽 MAX_LINK_LENGTH 바이트 안에서 시작하는 링크는 잘렸을 수 있으니 다음 조각으로 미룸
+        cut = max(0, len(buffer) - MAX_LINK_LENGTH - 16)
+        for match in _BLOG_LINK_RE.finditer(buffer):
+            if match.start() >= cut:
+                break
+            link = match.group().decode('utf-8', 'ignore').replace('&amp;', '&')
+            key = _link_key(link)
+            if key and key not in seen:
+                seen.add(key)
+                yield link
+        buffer = buffer[cut:]
+
+    for match in _BLOG_LINK_RE.finditer(buffer):
+        link = match.group().decode('utf-8', 'ignore').replace('&amp;', '&')
+        key = _link_key(link)
+        if key and key not in seen:
+            seen.add(key)
+            yield link
+
+
+def _matches(target_url, link):
+    post_id = parse_post_id(target_url)
+    if post_id:
+        return parse_post_id(link) == post_id
+    normalized_target = normalize_url(target_url)
+    normalized_link = normalize_url(link)
+    return normalized_target in normalized_link or normalized_link in normalized_target
+
+
+def scan_page(url, target_url, cutoff):
+    """
+    검색 결과 페이지를 읽으면서 대상 링크 순위 확인
+    (순위 또는 None, 매칭된 링크, 확인한 링크 수, 끝까지 확인했는지) 반환
+    찾거나 cutoff에 도달하면 바로 읽기 중단, 요청 마감 시간이 지나도 그때까지 읽은 만큼만 확인
+    """
+    deadline = current_deadline()
+    response = http_client.get(url, headers=MOBILE_HEADERS, timeout=HTML_RANKING_TIMEOUT, stream=True)
+    try:
+        if response.status_code != 200:
+            raise Exception(f'검색 결과 페이지 응답 오류: {response.status_code}')
+
+        count = 0
+        for link in iter_blog_links(response.iter_content(CHUNK_SIZE)):
+            count += 1
+            if _matches(target_url, link):
+                return count, link, count, True
+            if count >= cutoff:
+                break
+            if deadline is not None and deadline.expired:
+                return None, None, count, False
+        return None, None, count, True
+    finally:
+        response.close()
+
+
+def check_ranking_html(keyword, target_url):
+    """
+    통합검색 / 블로그 탭 HTML에서 순위 확인 (두 페이지 동시 요청)
+    check_blog_ranking과 같은 영역별 순위 형식 + 확인한 링크 수(scanned), 마감 시간 때문에 덜 읽었는지(partial) 반환
+    """
+    query = urllib.parse.quote(keyword)
+    scan = bind_deadline(scan_page)
+    main_future = _executor.submit(scan, f'{MAIN_SEARCH_URL}?query={query}', target_url, MAIN_CUTOFF)
+    blog_future = _executor.submit(scan, f'{MAIN_SEARCH_URL}?where=post&query={query}', target_url, BLOG_TAB_CUTOFF)
+
+    main_rank, main_link, main_scanned, main_complete = main_future.result()
+    blog_tab_rank, blog_link, blog_scanned, blog_complete = blog_future.result()
+
+    smartblock_rank = main_rank if main_rank is not None and main_rank <= 10 else None
+    main_blog_rank = main_rank - 10 if main_rank is not None and main_rank > 10 else None
+
+    result = area_ranks(smartblock_rank, main_blog_rank, blog_tab_rank)
+    result['matchedLink'] = main_link or blog_link
+    result['scanned'] = {'main': main_scanned, 'blogTab': blog_scanned}
+    result['partial'] = not (main_complete and blog_complete)
+    return result
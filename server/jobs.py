@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+작업(job) 관리 모듈
+- 분석 요청마다 job id를 발급하고, 진행률/부분 결과를 job별로 보관해서
+  여러 사용자가 동시에 분석해도 서로의 진행률이 섞이지 않도록 함
+- 오래 걸리는 분석은 크기 제한이 있는 대기열 + 워커 스레드에서 실행하고,
+  결과는 일정 시간 동안 보관했다가 제거
+"""
+import json
+import math
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+
+from metrics import job_keywords, job_seconds, keywords_processed
+
+# 끝난 job(결과 포함)을 보관하는 시간(초)
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', '600'))
+
+# 동시에 실행하는 분석 작업 수
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '2'))
+
+# 대기열 최대 길이 (초과 시 제출 거부)
+ANALYSIS_QUEUE_SIZE = int(os.getenv('ANALYSIS_QUEUE_SIZE', '20'))
+
+# 분석 작업 하나의 전체 시간(초) - 요청의 deadline으로 줄이거나 ANALYSIS_MAX_DEADLINE까지 늘릴 수 있음
+ANALYSIS_DEADLINE = float(os.getenv('ANALYSIS_DEADLINE', '120'))
+ANALYSIS_MAX_DEADLINE = float(os.getenv('ANALYSIS_MAX_DEADLINE', '600'))
+
+# 클라이언트가 정할 수 있는 job id - 16~32자리 hex 또는 uuid
+JOB_ID_RE = re.compile(r'[0-9a-f]{16,32}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+# SSE 연결 유지용 heartbeat 간격(초)
+SSE_HEARTBEAT = 15
+
+
+def analysis_deadline(requested=None):
+    """
+    요청한 분석 시간(초) - 없으면 기본값, ANALYSIS_MAX_DEADLINE을 넘지 않음
+    숫자가 아니면 ValueError (job을 만들기 전에 호출)
+    """
+    try:
+        seconds = float(requested or ANALYSIS_DEADLINE)
+    except (TypeError, ValueError):
+        raise ValueError('deadline은 초 단위 숫자여야 합니다.')
+    if math.isnan(seconds):
+        raise ValueError('deadline은 초 단위 숫자여야 합니다.')
+    return max(1.0, min(seconds, ANALYSIS_MAX_DEADLINE))
+
+
+class JobCancelled(Exception):
+    """실행 중인 job이 취소됨"""
+
+
+class JobExists(Exception):
+    """클라이언트가 정한 job id가 이미 사용 중"""
+
+
+class QueueFull(Exception):
+    """대기열이 가득 차서 job을 받을 수 없음"""
+
+
+class Job:
+    """분석 작업 하나의 상태, 결과, 이벤트 기록"""
+
+    def __init__(self, job_id, total=0):
+        self.id = job_id
+        self.status = 'queued'
+        self.current = 0
+        self.total = total
+        self.message = ''
+        self.error = None
+        self.result = None
+        self.cancelled = False
+        self.created_at = time.time()
+        self.finished_at = None
+        self._done = threading.Event()
+        self._events = []
+        self._cond = threading.Condition()
+
+    def _emit(self, event, data):
+        with self._cond:
+            self._events.append((event, data))
+            self._cond.notify_all()
+
+    def progress(self):
+        """진행률 (기존 /progress 응답과 같은 형식 + job 정보)"""
+        return {
+            'jobId': self.id,
+            'status': self.status,
+            'current': self.current,
+            'total': self.total,
+            'message': self.message,
+            'error': self.error
+        }
+
+    def start(self, total):
+        self.status = 'running'
+        self.total = total
+        self.current = 0
+        self._emit('progress', self.progress())
+
+    def add_row(self, index, row, message=''):
+        """키워드 하나 완료 - 진행률을 올리고 부분 결과를 이벤트로 기록"""
+        with self._cond:
+            self.current += 1
+            self.message = message
+        keywords_processed.inc()
+        self._emit('row', {'index': index, 'row': row})
+        self._emit('progress', self.progress())
+
+    def _close(self, status, event, data):
+        self.status = status
+        self.finished_at = time.time()
+        self._emit(event, data)
+        self._done.set()
+
+    def finish(self, result=None, summary=None):
+        """완료 - result는 /jobs/<id>/result 로 조회, summary는 done 이벤트에 포함"""
+        self.result = result
+        self._close('done', 'done', dict(self.progress(), status='done', result=summary))
+
+    def fail(self, error):
+        self.error = error
+        self._close('failed', 'failed', dict(self.progress(), status='failed'))
+
+    def cancel(self):
+        """취소 요청 - 대기 중이면 바로 취소, 실행 중이면 작업이 확인하고 중단"""
+        self.cancelled = True
+        if self.status == 'queued':
+            self.mark_cancelled()
+
+    def mark_cancelled(self):
+        if not self.finished:
+            self._close('cancelled', 'cancelled', dict(self.progress(), status='cancelled'))
+
+    def check_cancelled(self):
+        """실행 중인 작업에서 호출 - 취소됐으면 JobCancelled 발생"""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def wait(self, timeout=None):
+        """job이 끝날 때까지 대기"""
+        return self._done.wait(timeout)
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    def events(self, heartbeat=None):
+        """
+        이벤트 (event, data)를 내보내는 generator
+        처음부터 지금까지의 이벤트를 먼저 보내고, job이 끝날 때까지 새 이벤트를 기다려서 전달
+        heartbeat초 동안 새 이벤트가 없으면 (None, None)을 내보냄
+        """
+        sent = 0
+        while True:
+            with self._cond:
+                if sent >= len(self._events) and not self.finished:
+                    self._cond.wait(heartbeat)
+                events = self._events[sent:]
+                sent += len(events)
+                finished = self.finished and sent >= len(self._events)
+
+            if not events and not finished and heartbeat:
+                yield None, None
+            for event, data in events:
+                yield event, data
+            if finished:
+                return
+
+    def stream(self):
+        """text/event-stream (SSE) 형식 generator"""
+        for event, data in self.events(heartbeat=SSE_HEARTBEAT):
+            if event is None:
+                yield ': heartbeat\n\n'
+            else:
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def ndjson(self):
+        """
+        NDJSON 형식 generator - 키워드 하나당 한 줄, 마지막에 요약 한 줄
+        {"type": "row", "index": ..., "row": {...}}
+        {"type": "summary" | "failed" | "cancelled", ...진행률, "result": 요약}
+        """
+        for event, data in self.events():
+            if event == 'row':
+                line = dict(data, type='row')
+            elif event == 'done':
+                line = dict(data, type='summary')
+            elif event in ('failed', 'cancelled'):
+                line = dict(data, type=event)
+            else:
+                continue
+            yield json.dumps(line, ensure_ascii=False) + '\n'
+
+
+class JobRegistry:
+    """job id → Job 보관소 (끝난 job은 JOB_RETENTION 후 제거)"""
+
+    def __init__(self, retention=JOB_RETENTION):
+        self.retention = retention
+        self._jobs = {}
+        self._cond = threading.Condition()
+
+    def create(self, job_id=None, total=0):
+        """
+        새 job 생성 (클라이언트가 정한 job id도 사용 가능)
+        형식이 맞지 않으면 ValueError, 이미 있는 id면 JobExists
+        """
+        if job_id is not None and not (isinstance(job_id, str) and JOB_ID_RE.fullmatch(job_id)):
+            raise ValueError('jobId는 16~32자리 hex 또는 uuid 문자열이어야 합니다.')
+        self.prune()
+        job = Job(job_id or uuid.uuid4().hex, total)
+        with self._cond:
+            if job.id in self._jobs:
+                raise JobExists(job.id)
+            self._jobs[job.id] = job
+            self._cond.notify_all()
+        return job
+
+    def get(self, job_id, wait=0):
+        """job 조회 - wait초 동안 생성되기를 기다릴 수 있음 (스트림을 먼저 연 경우)"""
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while job_id not in self._jobs:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._jobs[job_id]
+
+    def prune(self):
+        now = time.time()
+        with self._cond:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished and now - job.finished_at > self.retention]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+class JobQueue:
+    """
+    크기 제한이 있는 대기열 + 고정 개수 워커 스레드
+    submit(job, fn, *args)로 넣은 작업은 워커가 fn(job, *args)로 실행하고,
+    반환값 (result, summary)로 job을 완료 처리
+    """
+
+    def __init__(self, workers=ANALYSIS_WORKERS, max_depth=ANALYSIS_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self._queue = queue.Queue(maxsize=max(1, max_depth))
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job, fn, args = self._queue.get()
+            started = time.perf_counter()
+            try:
+                if job.cancelled:
+                    job.mark_cancelled()
+                    continue
+                result, summary = fn(job, *args)
+                job.finish(result, summary)
+            except JobCancelled:
+                job.mark_cancelled()
+            except Exception as e:
+                print(f"[ERROR] 작업 {job.id} 실패: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                job.fail(str(e))
+            finally:
+                # 시작하기 전에 취소된 작업은 기록하지 않음
+                if job.current or job.status != 'cancelled':
+                    job_keywords.labels(job.status).observe(job.current)
+                    job_seconds.labels(job.status).observe(time.perf_counter() - started)
+                self._queue.task_done()
+
+    def submit(self, job, fn, *args):
+        """작업 제출 - 대기열이 가득 차 있으면 QueueFull"""
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait((job, fn, args))
+        except queue.Full:
+            job.fail('대기열이 가득 찼습니다.')
+            raise QueueFull()
+        return job
+
+    def depth(self):
+        return self._queue.qsize()
+
+
+job_registry = JobRegistry()
+job_queue = JobQueue()
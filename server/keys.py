@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+API 키 풀 모듈
+- 광고 API / 검색 API 키를 여러 벌 등록해서 번갈아 사용 (키 수만큼 처리량과 일일 한도가 늘어남)
+- 키별로 오늘 사용량(일일 한도 대비 남은 양)과 최근 429 응답을 기록
+- 최근 429를 받은 키는 KEY_THROTTLE_COOLDOWN초 동안 건너뛰고, 한도를 다 쓴 키는 다음 날까지 제외
+- 선택 방식: round_robin(순서대로) / least_used(오늘 사용량이 가장 적은 키)
+"""
+import glob
+import os
+import threading
+import time
+from datetime import date
+
+from upstream import UpstreamError, credential_id
+
+# 429를 받은 키를 쉬게 하는 시간(초)
+KEY_THROTTLE_COOLDOWN = float(os.getenv('KEY_THROTTLE_COOLDOWN', '30'))
+
+# 키 선택 방식 (round_robin / least_used)
+KEY_POOL_STRATEGY = os.getenv('KEY_POOL_STRATEGY', 'least_used')
+
+
+def read_key_file(path):
+    """'이름: 값' 형식 키 파일 → 값 리스트 (기존 ad_key.txt / search_key.txt 형식)"""
+    with open(path, 'r') as f:
+        return [line.strip().replace(" ", "").split(':')[-1] for line in f if line.strip()]
+
+
+def extra_credentials(env_names, file_prefix):
+    """
+    첫 번째 키 외에 추가로 등록된 키 목록
+    - 환경 변수: {이름}_2, {이름}_3, ... (첫 번째 이름이 없는 번호에서 멈춤)
+    - 파일: {file_prefix}_2.txt, {file_prefix}_3.txt, ...
+    """
+    credentials = []
+    n = 2
+    while os.getenv(f'{env_names[0]}_{n}'):
+        credentials.append([os.getenv(f'{name}_{n}') for name in env_names])
+        n += 1
+
+    def number(path):
+        suffix = os.path.splitext(path)[0].rsplit('_', 1)[-1]
+        return int(suffix) if suffix.isdigit() else 0
+
+    for path in sorted(glob.glob(f'{file_prefix}_*.txt'), key=number):
+        if number(path) >= 2:
+            credentials.append(read_key_file(path))
+    return credentials
+
+
+class Credential:
+    """키 한 벌 (values: [API 키, 시크릿, ...]) + 사용 기록"""
+
+    def __init__(self, values, daily_budget=None):
+        self.values = list(values)
+        self.id = credential_id(*self.values[:1])
+        self.daily_budget = daily_budget
+        self.used_today = 0
+        self.day = date.today()
+        self.inflight = 0
+        self.throttled = 0
+        self.throttled_until = 0.0
+        self.errors = 0
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.used_today = 0
+
+    @property
+    def remaining(self):
+        if self.daily_budget is None:
+            return None
+        return max(0, self.daily_budget - self.used_today)
+
+    def stats(self):
+        return {
+            'id': self.id,
+            'usedToday': self.used_today,
+            'dailyBudget': self.daily_budget,
+            'remaining': self.remaining,
+            'inflight': self.inflight,
+            'throttled': self.throttled,
+            'cooldown': round(max(0.0, self.throttled_until - time.monotonic()), 1),
+            'errors': self.errors
+        }
+
+
+class KeyPool:
+    """
+    API 키 풀 (스레드 안전)
+    call(fn)은 키를 하나 골라 fn(*키 값)을 실행하고, 결과(429 등)를 그 키의 기록에 반영
+    """
+
+    def __init__(self, name, daily_budget=None, strategy=KEY_POOL_STRATEGY, cooldown=KEY_THROTTLE_COOLDOWN):
+        self.name = name
+        self.daily_budget = daily_budget
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self._credentials = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def load(self, credentials):
+        """키 목록 등록 (같은 키는 한 번만, 기존 사용 기록은 유지)"""
+        with self._lock:
+            existing = {credential.id: credential for credential in self._credentials}
+            loaded = {}
+            for values in credentials:
+                if not values or not all(values):
+                    continue
+                credential = Credential(values, self.daily_budget)
+                loaded.setdefault(credential.id, existing.get(credential.id, credential))
+            loaded = list(loaded.values())
+            self._credentials = loaded
+            self._next = 0
+        print(f"[INFO] {self.name} API 키 {len(loaded)}개 등록")
+
+    def __len__(self):
+        return len(self._credentials)
+
+    @property
+    def scope(self):
+        """캐시/합치기 키용 풀 식별자 (어느 키로 받아도 같은 결과인 호출에 사용)"""
+        return f'pool:{self.name}'
+
+    def acquire(self):
+        """사용할 키 선택 - 모든 키가 일일 한도를 다 썼으면 UpstreamError(429)"""
+        with self._lock:
+            if not self._credentials:
+                raise UpstreamError(f'{self.name} API 키가 등록되지 않았습니다.')
+
+            now = time.monotonic()
+            for credential in self._credentials:
+                credential._roll_day()
+            available = [c for c in self._credentials if c.remaining is None or c.remaining > 0]
+            if not available:
+                raise UpstreamError(f'{self.name} API 키의 일일 한도를 모두 사용했습니다.', 429)
+
+            # 쉬는 중이 아닌 키가 없으면 가장 먼저 풀리는 키 사용
+            ready = [c for c in available if c.throttled_until <= now]
+            candidates = ready or [min(available, key=lambda c: c.throttled_until)]
+
+            if self.strategy == 'round_robin':
+                order = self._credentials[self._next:] + self._credentials[:self._next]
+                credential = next(c for c in order if c in candidates)
+                self._next = (self._credentials.index(credential) + 1) % len(self._credentials)
+            else:
+                credential = min(candidates, key=lambda c: (c.used_today + c.inflight, c.inflight))
+
+            credential.used_today += 1
+            credential.inflight += 1
+            return credential
+
+    def release(self, credential, error=None):
+        """호출 결과 반영 - 429면 그 키를 cooldown초 동안 쉬게 함"""
+        with self._lock:
+            credential.inflight -= 1
+            if error is None:
+                return
+            credential.errors += 1
+            if getattr(error, 'status', None) == 429:
+                credential.throttled += 1
+                credential.throttled_until = time.monotonic() + self.cooldown
+
+    def call(self, fn):
+        """키를 골라 fn(*키 값) 실행"""
+        credential = self.acquire()
+        try:
+            result = fn(*credential.values)
+        except Exception as e:
+            self.release(credential, e)
+            raise
+        self.release(credential)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'strategy': self.strategy,
+                'keys': [credential.stats() for credential in self._credentials]
+            }
+
+
+# 검색 API 일일 한도 25,000회 (키마다), 광고 API는 별도 한도 없음
+search_key_pool = KeyPool('검색', daily_budget=int(os.getenv('NAVER_SEARCH_DAILY_BUDGET', '25000')))
+ad_key_pool = KeyPool('광고')
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+서버 지표(metrics) 모듈 - Prometheus 텍스트 형식으로 /metrics 응답
+- 라우트별 요청 수/처리 시간, upstream 호스트별 호출 시간/오류 수, 작업별 처리 키워드 수,
+  Chrome(Selenium) 세션 기동/사용 시간 등을 기록
+- 기록은 잠금 한 번 + 버킷 이진 탐색뿐이라 키워드/페이지 반복문 안에서도 그대로 사용
+- 캐시 적중률처럼 이미 다른 곳에서 세고 있는 값은 수집 함수를 등록해서 /metrics 요청 때만 읽음
+"""
+import bisect
+import math
+import threading
+import time
+
+# 처리 시간(초) 기본 버킷
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 작업 하나에서 처리한 키워드 수 버킷
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """라벨 값별 기록 대상 (처음 쓰는 라벨 조합이면 생성)"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        """(이름, 라벨 [(이름, 값)], 값) 목록"""
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            yield from child.samples(self.name, list(zip(self.labelnames, values)))
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        yield name, labels, self.value
+
+
+class Counter(_Metric):
+    """누적 횟수 (이름은 _total로 끝나게)"""
+    type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        """라벨이 없는 지표용"""
+        self.labels().inc(amount)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        """with 블록의 실행 시간 기록"""
+        return _Timer(self)
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            yield f'{name}_bucket', labels + [('le', _format_value(float(bound)))], cumulative
+        yield f'{name}_sum', labels, total
+        yield f'{name}_count', labels, cumulative
+
+
+class _Timer:
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Histogram(_Metric):
+    """값 분포 (버킷별 누적 개수 + 합계)"""
+    type = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        """라벨이 없는 지표용"""
+        self.labels().observe(value)
+
+
+class MetricsRegistry:
+    """
+    지표 목록 + /metrics 텍스트 생성
+    collector는 인자 없이 [(이름, 종류, 설명, [(라벨 dict, 값), ...]), ...]를 반환하는 함수
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """Prometheus 텍스트 형식 (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"[WARNING] 지표 수집 실패: {str(e)}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 라우트별 요청
+http_requests = registry.counter('http_requests_total', '라우트별 요청 수', ('route', 'method', 'status'))
+http_request_seconds = registry.histogram('http_request_duration_seconds', '라우트별 처리 시간(초)',
+                                          ('route', 'method'))
+
+# upstream 호스트별 호출
+upstream_request_seconds = registry.histogram('upstream_request_duration_seconds', 'upstream 호스트별 호출 시간(초)',
+                                              ('host',))
+upstream_errors = registry.counter('upstream_errors_total', 'upstream 호스트별 오류 수 (연결 오류/타임아웃, 5xx, 429)',
+                                   ('host', 'kind'))
+
+# 분석 작업
+job_keywords = registry.histogram('analysis_job_keywords', '작업 하나에서 처리한 키워드 수', ('status',),
+                                  buckets=COUNT_BUCKETS)
+job_seconds = registry.histogram('analysis_job_duration_seconds', '작업 하나의 실행 시간(초)', ('status',))
+keywords_processed = registry.counter('analysis_keywords_processed_total', '처리한 키워드 수')
+
+# Chrome(Selenium) 세션
+selenium_session_start_seconds = registry.histogram('selenium_session_start_seconds', 'Chrome 세션 기동 시간(초)')
+selenium_session_use_seconds = registry.histogram('selenium_session_use_seconds', 'Chrome 세션 한 번 사용한 시간(초)',
+                                                  ('result',))
+
+
+def instrument_app(app):
+    """Flask 앱의 모든 라우트에 요청 수/처리 시간 기록"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            http_requests.labels(route, request.method, str(response.status_code)).inc()
+            http_request_seconds.labels(route, request.method).observe(time.perf_counter() - started)
+        return response
+
+
+def cache_collector(caches):
+    """
+    캐시 적중률 수집 함수 - caches는 이름 → hits/misses(/stale_hits) 통계 dict를 반환하는 함수
+    (ResultMemo처럼 reused/processed를 주는 통계도 같은 방식으로 계산)
+    """
+    def collect():
+        hits, misses, ratios = [], [], []
+        for name, get_stats in caches.items():
+            stats = get_stats()
+            hit = stats.get('hits', stats.get('reused', 0)) + stats.get('stale_hits', 0)
+            miss = stats.get('misses', stats.get('processed', 0))
+            hits.append(({'cache': name}, hit))
+            misses.append(({'cache': name}, miss))
+            ratios.append(({'cache': name}, round(hit / (hit + miss), 4) if hit + miss else 0))
+        return [
+            ('cache_hits_total', 'counter', '캐시 적중 수', hits),
+            ('cache_misses_total', 'counter', '캐시 미적중 수', misses),
+            ('cache_hit_ratio', 'gauge', '캐시 적중률', ratios)
+        ]
+    return collect
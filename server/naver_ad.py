@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+네이버 광고 API(키워드 도구) 호출 모듈
+keywordstool 응답은 힌트 키워드 + API 키 단위로 stale-while-revalidate 캐시에 보관
+여러 시드는 한 번에 최대 5개씩 묶어서 조회
+"""
+import base64
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from breaker import keywordstool_breaker
+from cache import StaleWhileRevalidateCache, normalize_keyword
+from upstream import (DeadlineExceeded, RetryBudget, UpstreamError, ad_api_limiter, bind_deadline, call_with_retry,
+                      credential_id, limited_get, single_flight)
+
+BASE_URL = 'https://api.naver.com'
+
+# 월간 검색량은 하루 단위로만 바뀌므로 12시간 동안은 신선한 값, 7일까지는 이전 값을 내주며 갱신
+keywordstool_cache = StaleWhileRevalidateCache(
+    maxsize=int(os.getenv('KEYWORDSTOOL_CACHE_SIZE', '5000')),
+    ttl=float(os.getenv('KEYWORDSTOOL_CACHE_TTL', '43200')),
+    stale_ttl=float(os.getenv('KEYWORDSTOOL_CACHE_STALE_TTL', '604800'))
+)
+
+
+class Signature:
+    @staticmethod
+    def generate(timestamp, method, uri, secret_key):
+        message = "{}.{}.{}".format(timestamp, method, uri)
+        hash = hmac.new(bytes(secret_key, "utf-8"), bytes(message, "utf-8"), hashlib.sha256)
+        hash.hexdigest()
+        return base64.b64encode(hash.digest())
+
+    def get_header(self, method, uri, api_key, secret_key, customer_id):
+        timestamp = str(round(time.time() * 1000))
+        signature = Signature.generate(timestamp, method, uri, secret_key)
+
+        return {'Content-Type': 'application/json; charset=UTF-8', 'X-Timestamp': timestamp,
+                'X-API-KEY': api_key, 'X-Customer': str(customer_id), 'X-Signature': signature}
+
+
+def request_keywordstool(hint_keywords, api_key, secret_key, customer_id):
+    """keywordstool API 호출 (캐시 없이) - keywordList 반환"""
+    uri = '/keywordstool'
+    method = 'GET'
+
+    params = {}
+    params['hintKeywords'] = hint_keywords
+    params['showDetail'] = '1'
+
+    r = limited_get(ad_api_limiter.for_key(api_key), BASE_URL + uri, params=params,
+                    headers=Signature().get_header(method, uri, api_key, secret_key, customer_id))
+
+    # 응답 확인
+    response_data = r.json()
+    print(f"[DEBUG] API 응답 상태: {r.status_code}")
+    print(f"[DEBUG] API 응답 키: {response_data.keys()}")
+
+    if 'keywordList' not in response_data:
+        print(f"[ERROR] API 응답 전체: {response_data}")
+        raise UpstreamError(f"API 오류: {response_data.get('message', '알 수 없는 오류')}", r.status_code)
+
+    return response_data['keywordList']
+
+
+def get_keyword_list(hint_keywords, api_key=None, secret_key=None, customer_id=None, key_pool=None,
+                     retry_budget=None):
+    """
+    keywordstool 결과 조회 (캐시 사용, 같은 키의 동시 호출은 하나로 합침)
+    key_pool을 지정하면 풀의 키를 번갈아 사용 (캐시는 풀 전체가 공유)
+    429/일시적 오류는 retry_budget 안에서 재시도, 장애가 계속되면 회로 차단기가 바로 실패시키고
+    캐시에 남아 있는 마지막 결과 사용
+    """
+    if key_pool is not None:
+        key = (normalize_keyword(hint_keywords), key_pool.scope)
+
+        def request():
+            return key_pool.call(lambda *values: request_keywordstool(hint_keywords, *values))
+    else:
+        key = (normalize_keyword(hint_keywords), credential_id(api_key, customer_id))
+
+        def request():
+            return request_keywordstool(hint_keywords, api_key, secret_key, customer_id)
+
+    return keywordstool_cache.get(
+        key, lambda: single_flight.do(
+            ('keywordstool',) + key, lambda: call_with_retry(lambda: keywordstool_breaker.call(request), retry_budget)
+        )
+    )
+
+
+# keywordstool 한 번에 보낼 수 있는 최대 힌트 키워드 수
+KEYWORDSTOOL_MAX_HINTS = 5
+
+# 배치 조회 시 동시에 보내는 keywordstool 호출 수
+KEYWORDSTOOL_BATCH_WORKERS = int(os.getenv('KEYWORDSTOOL_BATCH_WORKERS', '4'))
+
+
+def get_keyword_list_batch(seeds, api_key=None, secret_key=None, customer_id=None, max_workers=None, key_pool=None):
+    """
+    여러 시드 키워드를 KEYWORDSTOOL_MAX_HINTS개씩 묶어서 동시에 조회하고 결과를 병합
+
+    relKeyword 기준으로 중복을 제거하고, 각 행의 'seeds'에 그 행을 만든 시드를 기록
+    (시드와 같은 relKeyword는 그 시드만, 나머지는 같은 묶음의 시드 전체)
+
+    Returns:
+        (rows, errors)
+        rows: keywordList 항목 + 'seeds' 리스트
+        errors: [{'seeds': [...], 'error': 오류 메시지, 'timedOut': 마감 시간 초과 여부}, ...]
+    """
+    # 시드 중복 제거 (입력 순서 유지)
+    unique_seeds = []
+    seen = set()
+    for seed in seeds:
+        key = normalize_keyword(seed)
+        if key and key not in seen:
+            seen.add(key)
+            unique_seeds.append(seed.strip())
+
+    groups = [unique_seeds[i:i + KEYWORDSTOOL_MAX_HINTS]
+              for i in range(0, len(unique_seeds), KEYWORDSTOOL_MAX_HINTS)]
+    if not groups:
+        return [], []
+
+    def lookup(group):
+        return get_keyword_list(','.join(group), api_key, secret_key, customer_id, key_pool=key_pool,
+                                retry_budget=retry_budget)
+
+    default_workers = KEYWORDSTOOL_BATCH_WORKERS * max(1, len(key_pool)) if key_pool is not None \
+        else KEYWORDSTOOL_BATCH_WORKERS
+    workers = max(1, min(max_workers or default_workers, len(groups)))
+    retry_budget = RetryBudget.for_calls(len(groups))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(bind_deadline(lookup), group) for group in groups]
+
+    rows = {}
+    errors = []
+    for group, future in zip(groups, futures):
+        try:
+            keyword_list = future.result()
+        except Exception as e:
+            errors.append({'seeds': group, 'error': str(e), 'timedOut': isinstance(e, DeadlineExceeded)})
+            continue
+
+        group_seeds = {normalize_keyword(seed).replace(' ', ''): seed for seed in group}
+        for item in keyword_list:
+            rel_keyword = item.get('relKeyword', '')
+            matched_seed = group_seeds.get(normalize_keyword(rel_keyword).replace(' ', ''))
+            produced_by = [matched_seed] if matched_seed else group
+
+            row = rows.get(rel_keyword)
+            if row is None:
+                row = dict(item)
+                row['seeds'] = []
+                rows[rel_keyword] = row
+            for seed in produced_by:
+                if seed not in row['seeds']:
+                    row['seeds'].append(seed)
+
+    return list(rows.values()), errors
@@ -1,21 +1,29 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
-import time
-import urllib.parse
-import urllib.request
-import json
-import hashlib
-import hmac
-import base64
-import requests
 from datetime import datetime
-from bs4 import BeautifulSoup
 import os
 import threading
 
+from breaker import breakers
+from export import export_registry
+from hedge import hedgers
+from html_ranking import check_ranking_html
+from jobs import ANALYSIS_DEADLINE, JobExists, QueueFull, analysis_deadline, job_queue, job_registry
+from keys import ad_key_pool, extra_credentials, search_key_pool
+from metrics import CONTENT_TYPE, cache_collector, instrument_app, registry as metrics_registry
+from news import fetch_news_items, news_feed
+from naver_ad import Signature as AdSignature, get_keyword_list, get_keyword_list_batch, keywordstool_cache
+from naver_search import lookup_blog_totals, blog_total_cache
+from ranking import check_rankings_bulk, deep_search, rank_areas
+from tracking import rank_store, rank_tracker
+from trending import SELENIUM_AVAILABLE, browser_pool, scrape_memo, scrape_stats, trending_scheduler
+from upstream import (Deadline, ad_api_limiter, deadline_scope, http_client, retry_stats, search_api_limiter,
+                      single_flight, with_deadline)
+
 app = Flask(__name__)
 CORS(app)
+instrument_app(app)
 
 # 전역 변수
 ad_userkey_list = []
@@ -23,48 +31,10 @@ search_userkey_list = []
 google_youtube_keys = {}
 progress_status = {"current": 0, "total": 0, "message": ""}
 
-class Signature:
-    @staticmethod
-    def generate(timestamp, method, uri, secret_key):
-        message = "{}.{}.{}".format(timestamp, method, uri)
-        hash = hmac.new(bytes(secret_key, "utf-8"), bytes(message, "utf-8"), hashlib.sha256)
-        hash.hexdigest()
-        return base64.b64encode(hash.digest())
-
-    def get_header(self, method, uri, api_key, secret_key, customer_id):
-        timestamp = str(round(time.time() * 1000))
-        signature = Signature.generate(timestamp, method, uri, secret_key)
-
-        return {'Content-Type': 'application/json; charset=UTF-8', 'X-Timestamp': timestamp,
-                'X-API-KEY': api_key, 'X-Customer': str(customer_id), 'X-Signature': signature}
-
+class Signature(AdSignature):
     def getresults(self, hintKeywords):
-        BASE_URL = 'https://api.naver.com'
-
-        API_KEY = ad_userkey_list[0]
-        SECRET_KEY = ad_userkey_list[1]
-        CUSTOMER_ID = ad_userkey_list[2]
-
-        uri = '/keywordstool'
-        method = 'GET'
-
-        params={}
-        params['hintKeywords']=hintKeywords
-        params['showDetail']='1'
-
-        r=requests.get(BASE_URL + uri, params=params,
-                     headers= self.get_header(method, uri, API_KEY, SECRET_KEY, CUSTOMER_ID))
-
-        # 응답 확인
-        response_data = r.json()
-        print(f"[DEBUG] API 응답 상태: {r.status_code}")
-        print(f"[DEBUG] API 응답 키: {response_data.keys()}")
-
-        if 'keywordList' not in response_data:
-            print(f"[ERROR] API 응답 전체: {response_data}")
-            raise Exception(f"API 오류: {response_data.get('message', '알 수 없는 오류')}")
-
-        return response_data['keywordList']
+        # 등록된 광고 API 키들을 번갈아 사용
+        return get_keyword_list(hintKeywords, key_pool=ad_key_pool)
 
 # API 키 로드
 def load_api_keys():
@@ -134,10 +104,29 @@ def load_api_keys():
             except FileNotFoundError:
                 print("[WARNING] google_youtube_key.txt not found. Google/YouTube features will be disabled.")
 
+        # 추가 키 (NAVER_..._2, ad_key_2.txt 등)까지 키 풀에 등록
+        ad_key_pool.load([ad_userkey_list] + extra_credentials(
+            ['NAVER_AD_API_KEY', 'NAVER_AD_SECRET_KEY', 'NAVER_CUSTOMER_ID'], 'ad_key'))
+        search_key_pool.load([search_userkey_list] + extra_credentials(
+            ['NAVER_SEARCH_CLIENT_ID', 'NAVER_SEARCH_CLIENT_SECRET'], 'search_key'))
+
     except Exception as e:
         print(f"[ERROR] API 키 로드 실패: {str(e)}")
         raise
 
+def to_keyword_row(item):
+    """keywordstool 결과 항목을 응답 행으로 변환"""
+    mobile = int(str(item.get('monthlyMobileQcCnt', 0)).replace('<', '').strip())
+    pc = int(str(item.get('monthlyPcQcCnt', 0)).replace('<', '').strip())
+
+    return {
+        '연관키워드': item.get('relKeyword', ''),
+        '모바일검색량': mobile,
+        'PC검색량': pc,
+        '총검색량': mobile + pc,
+        '경쟁강도': item.get('compIdx', '')
+    }
+
 @app.route('/')
 def index():
     return jsonify({
@@ -147,6 +136,7 @@ def index():
     })
 
 @app.route('/search_keywords', methods=['POST'])
+@with_deadline()
 def search_keywords():
     try:
         keyword = request.json['keyword']
@@ -156,18 +146,7 @@ def search_keywords():
         keyword_list = signature_obj.getresults(keyword)
 
         # 데이터 변환
-        result_data = []
-        for item in keyword_list:
-            mobile = int(str(item.get('monthlyMobileQcCnt', 0)).replace('<', '').strip())
-            pc = int(str(item.get('monthlyPcQcCnt', 0)).replace('<', '').strip())
-
-            result_data.append({
-                '연관키워드': item.get('relKeyword', ''),
-                '모바일검색량': mobile,
-                'PC검색량': pc,
-                '총검색량': mobile + pc,
-                '경쟁강도': item.get('compIdx', '')
-            })
+        result_data = [to_keyword_row(item) for item in keyword_list]
 
         return jsonify({
             'success': True,
@@ -177,247 +156,283 @@ def search_keywords():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/search_keywords_batch', methods=['POST'])
+@with_deadline()
+def search_keywords_batch():
+    """
+    여러 시드 키워드의 연관 키워드 일괄 조회
+    keywordstool 호출 한 번에 시드 5개씩 묶어서 보내고, 결과는 연관키워드 기준으로 병합
+    """
+    try:
+        seeds = request.json['keywords']
+
+        rows, errors = get_keyword_list_batch(seeds, key_pool=ad_key_pool)
+
+        result_data = []
+        for item in rows:
+            row = to_keyword_row(item)
+            row['시드키워드'] = item['seeds']
+            result_data.append(row)
+
+        print(f"[INFO] 일괄 키워드 검색: 시드 {len(seeds)}개 → 연관 키워드 {len(result_data)}개")
+
+        return jsonify({
+            'success': len(result_data) > 0 or not errors,
+            'data': result_data,
+            'total': len(result_data),
+            'errors': errors,
+            'partial': any(error.get('timedOut') for error in errors)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+def run_competition_analysis(job, keywords_data, key_pool, deadline_seconds=ANALYSIS_DEADLINE):
+    """
+    경쟁도 분석 작업 본체 (작업 워커 스레드에서 실행) - (결과, 요약) 반환
+    시작 후 deadline_seconds초가 지나면 남은 키워드는 조회하지 않고 '미완료'로 표시
+    """
+    keywords = [item['연관키워드'] for item in keywords_data]
+    job.start(len(keywords_data))
+
+    progress_status["current"] = 0
+    progress_status["total"] = len(keywords_data)
+    progress_status["message"] = ""
+
+    # 키워드 하나 완료될 때마다 결과 반영 + 진행률 업데이트
+    def on_result(idx, result):
+        item = keywords_data[idx]
+        item['총문서수'] = result['total']
+        item['캐시'] = result['cache']
+        if result['error']:
+            item['오류'] = result['error']
+            print(f"[ERROR] {result['keyword']} 분석 실패: {result['error']}")
+        if result.get('timedOut'):
+            item['미완료'] = True
+
+        # 경쟁률 계산 (조회 실패는 0이 아니라 빈 값으로 두고 오류 표시)
+        if item['총문서수'] is None:
+            item['경쟁률'] = None
+        elif item['총문서수'] > 0:
+            item['경쟁률'] = item['총검색량'] / item['총문서수']
+        else:
+            item['경쟁률'] = 0
+
+        message = f"{result['keyword']} 분석 완료"
+        progress_status["current"] += 1
+        progress_status["message"] = message
+        job.add_row(idx, item, message)
+
+    # 총문서수 동시 조회 (검색 API 키 풀의 키를 번갈아 사용)
+    with deadline_scope(Deadline(deadline_seconds)):
+        lookup_blog_totals(keywords, None, None, on_result=on_result, is_cancelled=lambda: job.cancelled,
+                           key_pool=key_pool)
+    job.check_cancelled()
+
+    # 다운로드 파일은 /download 요청 시 생성
+    filename = export_registry.register(keywords_data, job.id)
+
+    summary = {
+        'filename': filename,
+        'count': len(keywords_data),
+        'errorCount': sum(1 for item in keywords_data if item.get('오류')),
+        'timedOutCount': sum(1 for item in keywords_data if item.get('미완료')),
+        'cacheHits': sum(1 for item in keywords_data if item.get('캐시') == 'hit')
+    }
+    return {'data': keywords_data, 'filename': filename}, summary
+
+def submit_competition_analysis(data):
+    """경쟁도 분석 작업을 대기열에 제출 (클라이언트가 jobId를 보내면 그 id 사용)"""
+    keywords_data = data['keywords']
+    # 입력 검증은 job을 만들기 전에 (잘못된 요청이 queued 상태 job으로 남지 않도록)
+    if not isinstance(keywords_data, list):
+        raise ValueError('keywords는 목록이어야 합니다.')
+    deadline_seconds = analysis_deadline(data.get('deadline'))
+    job = job_registry.create(data.get('jobId'), total=len(keywords_data))
+    return job_queue.submit(job, run_competition_analysis, keywords_data, search_key_pool, deadline_seconds)
+
 @app.route('/analyze_competition', methods=['POST'])
 def analyze_competition():
+    """
+    경쟁도 분석 (동기) - 작업 대기열에 넣고 끝날 때까지 기다렸다가 결과 반환
+    ?stream=ndjson (또는 body의 "stream": true) 이면 키워드가 끝날 때마다 한 줄씩 NDJSON으로 전송
+    """
     try:
-        keywords_data = request.json['keywords']
-
-        # 총문서수 조회
-        for idx, item in enumerate(keywords_data):
-            keyword = item['연관키워드']
-            client_id = search_userkey_list[0]
-            client_secret = search_userkey_list[1]
-
-            encText = urllib.parse.quote(keyword)
-            url = "https://openapi.naver.com/v1/search/blog?query=" + encText
-
-            req = urllib.request.Request(url)
-            req.add_header("X-Naver-Client-Id", client_id)
-            req.add_header("X-Naver-Client-Secret", client_secret)
-
-            response = urllib.request.urlopen(req)
-            rescode = response.getcode()
-
-            if rescode == 200:
-                response_body = response.read()
-                total_num = response_body.decode('utf-8')
-                item['총문서수'] = json.loads(total_num)['total']
-            else:
-                item['총문서수'] = 0
-
-            # 경쟁률 계산
-            if item['총문서수'] > 0:
-                item['경쟁률'] = item['총검색량'] / item['총문서수']
-            else:
-                item['경쟁률'] = 0
-
-            # 진행률 업데이트
-            progress_status["current"] = idx + 1
-            progress_status["total"] = len(keywords_data)
-            progress_status["message"] = f"{keyword} 분석 완료"
-
-            time.sleep(0.05)  # API 호출 제한 방지
-
-        # 엑셀 파일 저장 (openpyxl 사용)
-        from openpyxl import Workbook
-        now = datetime.now()
-        filename = f'키워드분석_{now.strftime("%Y%m%d_%H%M%S")}.xlsx'
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "키워드 분석"
-
-        # 헤더
-        headers = ['연관키워드', '모바일검색량', 'PC검색량', '총검색량', '경쟁강도', '총문서수', '경쟁률']
-        ws.append(headers)
-
-        # 데이터
-        for item in keywords_data:
-            ws.append([
-                item.get('연관키워드', ''),
-                item.get('모바일검색량', 0),
-                item.get('PC검색량', 0),
-                item.get('총검색량', 0),
-                item.get('경쟁강도', ''),
-                item.get('총문서수', 0),
-                item.get('경쟁률', 0)
-            ])
-
-        wb.save(filename)
+        job = submit_competition_analysis(request.json)
+
+        if request.args.get('stream') == 'ndjson' or request.json.get('stream'):
+            return Response(stream_with_context(job.ndjson()), mimetype='application/x-ndjson',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+        job.wait()
+
+        if job.status != 'done':
+            return jsonify({'success': False, 'error': job.error or '작업이 취소되었습니다.', 'jobId': job.id})
 
         return jsonify({
             'success': True,
-            'data': keywords_data,
-            'filename': filename
+            'data': job.result['data'],
+            'filename': job.result['filename'],
+            'partial': any(item.get('미완료') for item in job.result['data']),
+            'jobId': job.id
         })
+    except QueueFull:
+        return jsonify({'success': False, 'error': '분석 요청이 많습니다. 잠시 후 다시 시도해주세요.'}), 503
+    except JobExists:
+        return jsonify({'success': False, 'error': '이미 사용 중인 jobId입니다.'}), 409
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/jobs/analyze_competition', methods=['POST'])
+def submit_analyze_competition():
+    """경쟁도 분석 (비동기) - job id를 바로 반환, 진행률은 /jobs/<id>, 결과는 /jobs/<id>/result"""
+    try:
+        job = submit_competition_analysis(request.json)
+        return jsonify({'success': True, 'jobId': job.id, 'status': job.status}), 202
+    except QueueFull:
+        return jsonify({'success': False, 'error': '분석 요청이 많습니다. 잠시 후 다시 시도해주세요.'}), 503
+    except JobExists:
+        return jsonify({'success': False, 'error': '이미 사용 중인 jobId입니다.'}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(dict(job.progress(), success=True, queueDepth=job_queue.depth()))
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없거나 결과 보관 기간이 지났습니다.'}), 404
+    if job.status != 'done':
+        return jsonify(dict(job.progress(), success=False)), 409
+    return jsonify(dict(job.result, success=True, jobId=job.id))
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    job.cancel()
+    return jsonify(dict(job.progress(), success=True))
+
+
 @app.route('/progress')
 def get_progress():
     return jsonify(progress_status)
 
 
-@app.route('/download/<filename>')
-def download_file(filename):
-    return send_file(filename, as_attachment=True)
+@app.route('/progress/<job_id>')
+def get_job_progress(job_id):
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(job.progress())
 
-def get_naver_realtime_keywords():
-    """네이버 실시간 급상승 검색어 - Signal.bz 크롤링"""
-    try:
-        print("[INFO] Signal.bz에서 네이버 실시간 검색어 크롤링 시작...")
-
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.get('https://www.signal.bz/')
-        time.sleep(3)
-
-        # Signal.bz에서 네이버 실시간 검색어 추출
-        # 순위와 키워드를 분리해서 추출
-        keyword_elements = driver.find_elements(By.CSS_SELECTOR, '[class*="rank"]')
-
-        keywords = []
-        seen_keywords = set()
-
-        for elem in keyword_elements:
-            text = elem.text.strip()
-
-            # 순위 번호가 아니고, 빈 문자열이 아니며, 적절한 길이의 텍스트만 추출
-            if text and not text.isdigit() and len(text) > 2 and len(text) < 100:
-                # 줄바꿈 처리 (순위와 키워드가 함께 있는 경우)
-                if '\n' in text:
-                    parts = text.split('\n')
-                    keyword = parts[-1].strip()  # 마지막 부분이 키워드
-                else:
-                    keyword = text
-
-                # 중복 제거
-                if keyword not in seen_keywords and not keyword.isdigit():
-                    keywords.append({
-                        'keyword': keyword,
-                        'rank': len(keywords) + 1,
-                        'source': 'naver'
-                    })
-                    seen_keywords.add(keyword)
-
-                    if len(keywords) >= 10:
-                        break
-
-        driver.quit()
-
-        print(f"[INFO] Signal.bz에서 {len(keywords)}개 네이버 검색어 수집 완료")
-        return keywords[:10]
 
-    except Exception as e:
-        print(f"[ERROR] Signal.bz 크롤링 실패: {str(e)}")
-        import traceback
-        traceback.print_exc()
+@app.route('/progress/<job_id>/stream')
+def stream_job_progress(job_id):
+    """job 진행률/부분 결과를 Server-Sent Events로 전송"""
+    # 분석 요청보다 스트림 연결이 먼저 올 수 있으므로 job 생성을 잠시 기다림
+    job = job_registry.get(job_id, wait=10)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return Response(stream_with_context(job.stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-        # Fallback: 기존 방식 사용
-        print("[INFO] Fallback: 샘플 키워드 사용")
-        sample_keywords = ['날씨', '뉴스', '주식', '부동산', '축구', '야구', '환율', '코스피', '프리미어리그', 'K리그']
-        return [{'keyword': kw, 'rank': i+1, 'source': 'naver'} for i, kw in enumerate(sample_keywords)]
 
-def get_google_trends_keywords():
-    """구글 인기 검색어 - Adsensefarm.kr 크롤링"""
-    try:
-        print("[INFO] Adsensefarm.kr에서 구글 실시간 검색어 크롤링 시작...")
-
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.get('https://adsensefarm.kr/realtime/')
-        time.sleep(5)
-
-        # JavaScript 실행 완료 대기
-        WebDriverWait(driver, 10).until(
-            lambda d: d.execute_script('return document.readyState') == 'complete'
-        )
-
-        # Adsensefarm.kr에서 구글 실시간 검색어 추출
-        keyword_elements = driver.find_elements(By.CSS_SELECTOR, '#googletrend span.keyword a')
-
-        keywords = []
-        for i, elem in enumerate(keyword_elements):
-            text = elem.text.strip()
-            if text and len(text) < 100:
-                keywords.append({
-                    'keyword': text,
-                    'rank': i + 1,
-                    'source': 'google'
-                })
-
-        driver.quit()
-
-        print(f"[INFO] Adsensefarm.kr에서 {len(keywords)}개 구글 검색어 수집 완료")
-        return keywords[:10]
+@app.route('/cache_stats')
+def get_cache_stats():
+    return jsonify({
+        'blog_total': blog_total_cache.stats(),
+        'keywordstool': keywordstool_cache.stats(),
+        'news_feed': news_feed.stats,
+        'fingerprints': {
+            'trending': scrape_memo.stats()
+        }
+    })
+
+
+# /metrics 요청 때만 읽는 캐시 적중률
+metrics_registry.register_collector(cache_collector({
+    'blog_total': blog_total_cache.stats,
+    'keywordstool': keywordstool_cache.stats,
+    'latest_news': lambda: news_feed.stats,
+    'trending': scrape_memo.stats
+}))
 
-    except Exception as e:
-        print(f"[ERROR] Adsensefarm.kr 크롤링 실패: {str(e)}")
-        import traceback
-        traceback.print_exc()
 
-        # Fallback: 기존 방식 사용
-        print("[INFO] Fallback: 샘플 키워드 사용")
-        sample_keywords = ['ChatGPT', 'AI', '인공지능', 'Python', 'React', '디지털노마드', '재택근무', '부업', '투자', '주식']
-        return [{'keyword': kw, 'rank': i+1, 'source': 'google'} for i, kw in enumerate(sample_keywords)]
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus 텍스트 형식 지표"""
+    return Response(metrics_registry.render(), content_type=CONTENT_TYPE)
+
+
+@app.route('/upstream_stats')
+def get_upstream_stats():
+    return jsonify({
+        'pools': http_client.stats(),
+        'single_flight': single_flight.stats(),
+        'limits': {
+            'search': search_api_limiter.stats(),
+            'ad': ad_api_limiter.stats(),
+            'retries': retry_stats
+        },
+        'hedging': {name: hedger.stats() for name, hedger in hedgers.items()},
+        'keys': {
+            'search': search_key_pool.stats(),
+            'ad': ad_key_pool.stats()
+        },
+        'browser_pool': browser_pool.stats(),
+        'scrape': scrape_stats
+    })
+
+
+@app.route('/admin/breakers')
+def get_breakers():
+    """외부 API/크롤링 대상별 회로 차단기 상태 (closed / open / half_open)"""
+    return jsonify({'success': True, 'breakers': breakers.stats()})
+
+
+@app.route('/admin/breakers/<name>/reset', methods=['POST'])
+def reset_breaker(name):
+    """회로 차단기를 강제로 closed로 (대상 복구를 확인한 경우)"""
+    breaker = breakers.find(name)
+    if breaker is None:
+        return jsonify({'success': False, 'error': '회로 차단기를 찾을 수 없습니다.'}), 404
+    breaker.reset()
+    return jsonify({'success': True, 'breaker': breaker.stats()})
+
+
+@app.route('/download/<filename>')
+def download_file(filename):
+    """분석 결과 다운로드 - 확장자를 .csv / .parquet 로 바꾸면 해당 형식으로 생성"""
+    try:
+        path = export_registry.path_for(filename)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if path is None:
+        return jsonify({'success': False, 'error': '파일을 찾을 수 없거나 보관 기간이 지났습니다.'}), 404
+    return send_file(path, as_attachment=True, download_name=filename)
 
 def get_latest_news():
     """
     네이버 최신 뉴스 제목 가져오기 (네이버 검색 API 사용)
+    메모리의 최신 뉴스 목록을 반환하고, 오래됐으면 백그라운드에서 갱신
     """
     try:
-        if not search_userkey_list or len(search_userkey_list) < 2:
+        if not len(search_key_pool):
             print("[WARN] 네이버 검색 API 키 없음")
             return []
 
-        client_id = search_userkey_list[0]
-        client_secret = search_userkey_list[1]
-
-        # 최신 뉴스 검색 (정렬: 최신순)
-        encText = urllib.parse.quote("경제 OR 정책 OR IT OR 트렌드")
-        url = f"https://openapi.naver.com/v1/search/news.json?query={encText}&display=10&sort=date"
-
-        req = urllib.request.Request(url)
-        req.add_header("X-Naver-Client-Id", client_id)
-        req.add_header("X-Naver-Client-Secret", client_secret)
-
-        response = urllib.request.urlopen(req)
-        rescode = response.getcode()
-
-        if rescode == 200:
-            response_body = response.read()
-            result = json.loads(response_body.decode('utf-8'))
-
-            news_list = []
-            for idx, item in enumerate(result.get('items', [])[:10]):
-                # HTML 태그 제거
-                title = BeautifulSoup(item['title'], 'html.parser').get_text()
-                news_list.append({
-                    'keyword': title,
-                    'rank': idx + 1,
-                    'source': 'naver_news',
-                    'link': item.get('link', ''),
-                    'pubDate': item.get('pubDate', '')
-                })
-
-            print(f"[INFO] 네이버 최신 뉴스 {len(news_list)}개 수집")
-            return news_list
-        else:
-            print(f"[ERROR] 네이버 뉴스 API 오류: {rescode}")
-            return []
+        return news_feed.get(lambda: search_key_pool.call(fetch_news_items), limit=10)
 
     except Exception as e:
         print(f"[ERROR] 네이버 뉴스 가져오기 실패: {str(e)}")
@@ -429,22 +444,17 @@ def get_latest_news():
 def get_trending_keywords():
     """
     실시간 인기 검색어 조회
-    네이버와 구글의 실시간 트렌드 검색어 가져오기
+    백그라운드 스케줄러가 갱신한 네이버/구글 스냅샷을 바로 반환 (크롤링을 기다리지 않음)
     """
     try:
-        # 네이버 실시간 검색어
-        naver_keywords = get_naver_realtime_keywords()
-
-        # 구글 트렌드 검색어
-        google_keywords = get_google_trends_keywords()
-
-        # 실시간 데이터만 표시 (fallback 없음)
-        print(f"[INFO] 네이버: {len(naver_keywords)}개, 구글: {len(google_keywords)}개")
+        trending_scheduler.start()
+        keywords, sources = trending_scheduler.snapshot()
 
         return jsonify({
             'success': True,
-            'naver': naver_keywords,
-            'google': google_keywords,
+            'naver': keywords['naver'],
+            'google': keywords['google'],
+            'sources': sources,
             'timestamp': datetime.now().isoformat()
         })
 
@@ -458,6 +468,7 @@ def get_trending_keywords():
         })
 
 @app.route('/latest_news', methods=['GET'])
+@with_deadline()
 def latest_news():
     """
     오늘의 글감: 최신 뉴스 제목 조회
@@ -482,9 +493,12 @@ def latest_news():
         })
 
 @app.route('/check_blog_ranking', methods=['POST'])
+@with_deadline()
 def check_blog_ranking():
     """
     블로그 순위 추적 API (네이버 검색 API 사용)
+    요청의 depth로 검색 깊이 지정 가능 (기본 100위, 최대 1000위)
+    mode: 'html'이면 통합검색/블로그 탭 HTML에서 직접 확인 (스마트블록/블로그 영역 실제 노출 순위)
     """
     try:
         data = request.get_json()
@@ -499,91 +513,91 @@ def check_blog_ranking():
 
         print(f"[INFO] 블로그 순위 확인: {keyword} / {target_url}")
 
-        # URL 정규화
-        def normalize_url(url):
-            return url.replace('https://', '').replace('http://', '').replace('www.', '').split('?')[0].lower()
+        # mode: 'html'이면 검색 API 대신 모바일 검색 결과 페이지에서 직접 확인
+        if data.get('mode') == 'html':
+            try:
+                result = check_ranking_html(keyword, target_url)
+            except Exception as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 500
+
+            print(f"[INFO] 검색 결과 HTML 확인 완료 (링크 {result['scanned']})")
+            result['success'] = True
+            result['mode'] = 'html'
+            result['timestamp'] = datetime.now().isoformat()
+            return jsonify(result)
+
+        # 블로그 탭에서 depth위까지 검색 (100개씩, 찾으면 중단)
+        print(f"[INFO] 네이버 블로그 검색 API 호출")
+        try:
+            index = deep_search(keyword, [target_url], None, None, data.get('depth'), key_pool=search_key_pool)
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 500
 
-        normalized_target = normalize_url(target_url)
+        print(f"[INFO] 총 {index.depth}개 블로그 검색 결과 확인")
 
-        # 네이버 검색 API 헤더
-        client_id = search_userkey_list[0]
-        client_secret = search_userkey_list[1]
+        # 순위 찾기 (블로그 글 식별자 색인)
+        rank, link = index.find(target_url)
+        if rank is not None:
+            print(f"[INFO] 블로그 탭 {rank}위 발견")
+            print(f"[INFO] 매칭된 링크: {link}")
 
-        headers = {
-            'X-Naver-Client-Id': client_id,
-            'X-Naver-Client-Secret': client_secret
-        }
+        result = rank_areas(rank)
+        result['success'] = True
+        result['searchedDepth'] = index.depth
+        result['partial'] = index.partial
+        if index.error:
+            # 뒤 페이지 조회 실패 - 앞 페이지까지 확인한 결과는 그대로 반환
+            result['error'] = index.error
+        result['timestamp'] = datetime.now().isoformat()
+        return jsonify(result)
 
-        # 블로그 탭에서 최대 100개 검색 (display=100)
-        blog_tab_url = f"https://openapi.naver.com/v1/search/blog.json?query={urllib.parse.quote(keyword)}&display=100&sort=sim"
-        print(f"[INFO] 네이버 블로그 검색 API 호출")
+    except Exception as e:
+        print(f"[ERROR] 순위 확인 실패: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
-        response = requests.get(blog_tab_url, headers=headers, timeout=10)
-        result = response.json()
+@app.route('/check_blog_ranking_bulk', methods=['POST'])
+@with_deadline()
+def check_blog_ranking_bulk():
+    """
+    블로그 순위 일괄 확인
+    같은 키워드의 URL들은 검색 한 번으로 확인 (키워드별 검색은 동시에 수행)
+    요청: {"items": [{"keyword": ..., "targetUrl": ...}, ...]}
+    """
+    try:
+        data = request.get_json()
+        pairs = data.get('items') or []
 
-        if 'items' not in result:
-            print(f"[ERROR] API 응답 오류: {result}")
+        if not pairs or any(not pair.get('keyword') or not pair.get('targetUrl') for pair in pairs):
             return jsonify({
                 'success': False,
-                'error': 'API 응답 오류'
-            }), 500
+                'error': '각 항목에 키워드와 URL이 필요합니다.'
+            }), 400
 
-        items = result['items']
-        print(f"[INFO] 총 {len(items)}개 블로그 검색 결과")
-
-        # 순위 찾기
-        smartblock_rank = None
-        main_blog_rank = None
-        blog_tab_rank = None
-
-        for i, item in enumerate(items):
-            # link 필드에서 블로그 URL 추출
-            link = item.get('link', '')
-            normalized_link = normalize_url(link)
-
-            if normalized_target in normalized_link or normalized_link in normalized_target:
-                rank = i + 1
-
-                # 상위 10개는 스마트블록
-                if rank <= 10:
-                    smartblock_rank = rank
-                    print(f"[INFO] 스마트블록 {smartblock_rank}위 발견")
-                # 11-30위는 블로그 영역
-                elif rank <= 30:
-                    main_blog_rank = rank - 10
-                    print(f"[INFO] 블로그 영역 {main_blog_rank}위 발견")
-
-                # 블로그 탭 순위
-                blog_tab_rank = rank
-                print(f"[INFO] 블로그 탭 {blog_tab_rank}위 발견")
-                print(f"[INFO] 매칭된 링크: {link}")
-                break
+        results, search_count = check_rankings_bulk(pairs, None, None, depth=data.get('depth'),
+                                                    key_pool=search_key_pool)
+        print(f"[INFO] 블로그 순위 일괄 확인: {len(pairs)}건, 검색 {search_count}회")
 
         return jsonify({
             'success': True,
-            'smartblock': {
-                'found': smartblock_rank is not None,
-                'rank': smartblock_rank,
-                'area': 'smartblock',
-                'areaName': '통합검색-스마트블록'
-            },
-            'mainBlog': {
-                'found': main_blog_rank is not None,
-                'rank': main_blog_rank,
-                'area': 'blog',
-                'areaName': '통합검색-블로그'
-            },
-            'blogTab': {
-                'found': blog_tab_rank is not None,
-                'rank': blog_tab_rank,
-                'area': 'blog_tab',
-                'areaName': '블로그탭'
-            },
+            'results': results,
+            'searches': search_count,
+            'partial': any(result['partial'] or result['timedOut'] for result in results),
             'timestamp': datetime.now().isoformat()
         })
 
     except Exception as e:
-        print(f"[ERROR] 순위 확인 실패: {str(e)}")
+        print(f"[ERROR] 순위 일괄 확인 실패: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({
@@ -591,7 +605,70 @@ def check_blog_ranking():
             'error': str(e)
         }), 500
 
+@app.route('/rank_watches', methods=['POST'])
+def add_rank_watch():
+    """
+    순위 추적 대상 등록
+    요청: {"keyword": ..., "targetUrl": ..., "interval": 확인 주기(초, 선택)}
+    같은 (키워드, URL)이 이미 등록돼 있으면 기존 대상을 반환
+    """
+    data = request.get_json() or {}
+    keyword = data.get('keyword')
+    target_url = data.get('targetUrl')
+
+    if not keyword or not target_url:
+        return jsonify({
+            'success': False,
+            'error': '키워드와 URL이 필요합니다.'
+        }), 400
+
+    try:
+        watch = rank_store.add_watch(keyword, target_url, data.get('interval'))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'interval은 초 단위 숫자여야 합니다.'
+        }), 400
+
+    rank_tracker.start(search_key_pool)
+    rank_tracker.check_now()
+    return jsonify({'success': True, 'watch': watch})
+
+@app.route('/rank_watches', methods=['GET'])
+def list_rank_watches():
+    """등록된 순위 추적 대상 목록"""
+    return jsonify({'success': True, 'watches': rank_store.list_watches(), 'tracker': rank_tracker.stats})
+
+@app.route('/rank_watches/<int:watch_id>', methods=['DELETE'])
+def remove_rank_watch(watch_id):
+    """순위 추적 대상 삭제 (이력 포함)"""
+    if not rank_store.remove_watch(watch_id):
+        return jsonify({'success': False, 'error': '추적 대상을 찾을 수 없습니다.'}), 404
+    return jsonify({'success': True})
+
+@app.route('/rank_watches/<int:watch_id>/history', methods=['GET'])
+def get_rank_history(watch_id):
+    """
+    순위 이력 조회 (차트용, 네이버 API 호출 없음)
+    쿼리: since, until (unix time), limit (기본 500)
+    """
+    watch = rank_store.get_watch(watch_id)
+    if watch is None:
+        return jsonify({'success': False, 'error': '추적 대상을 찾을 수 없습니다.'}), 404
+
+    try:
+        history = rank_store.history(watch_id, request.args.get('since'), request.args.get('until'),
+                                     request.args.get('limit'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since, until, limit은 숫자여야 합니다.'}), 400
+
+    return jsonify({'success': True, 'watch': watch, 'history': history})
+
 if __name__ == '__main__':
     load_api_keys()
+    if SELENIUM_AVAILABLE:
+        threading.Thread(target=browser_pool.warm, daemon=True).start()
+    trending_scheduler.start()
+    rank_tracker.start(search_key_pool)
     port = int(os.getenv('PORT', 8080))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -1,20 +1,21 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
-import time
-import urllib.parse
-import urllib.request
-import json
-import hashlib
-import hmac
-import base64
-import requests
-from datetime import datetime
 import os
 
+from breaker import breakers
+from export import export_registry
+from jobs import ANALYSIS_DEADLINE, JobExists, QueueFull, analysis_deadline, job_queue, job_registry
+from keys import ad_key_pool, extra_credentials, search_key_pool
+from metrics import CONTENT_TYPE, cache_collector, instrument_app, registry as metrics_registry
+from naver_ad import Signature as AdSignature, get_keyword_list, get_keyword_list_batch, keywordstool_cache
+from naver_search import lookup_blog_totals, blog_total_cache
+from upstream import Deadline, deadline_scope, http_client, single_flight, with_deadline
+
 app = Flask(__name__)
 CORS(app)
+instrument_app(app)
 
 # 전역 변수
 ad_userkey_list = []
@@ -22,49 +23,12 @@ search_userkey_list = []
 google_youtube_keys = {}
 progress_status = {"current": 0, "total": 0, "message": ""}
 
-class Signature:
-    @staticmethod
-    def generate(timestamp, method, uri, secret_key):
-        message = "{}.{}.{}".format(timestamp, method, uri)
-        hash = hmac.new(bytes(secret_key, "utf-8"), bytes(message, "utf-8"), hashlib.sha256)
-        hash.hexdigest()
-        return base64.b64encode(hash.digest())
-
-    def get_header(self, method, uri, api_key, secret_key, customer_id):
-        timestamp = str(round(time.time() * 1000))
-        signature = Signature.generate(timestamp, method, uri, secret_key)
-
-        return {'Content-Type': 'application/json; charset=UTF-8', 'X-Timestamp': timestamp,
-                'X-API-KEY': api_key, 'X-Customer': str(customer_id), 'X-Signature': signature}
-
+class Signature(AdSignature):
     def getresults(self, hintKeywords, api_key=None, secret_key=None, customer_id=None):
-        BASE_URL = 'https://api.naver.com'
-
-        # 사용자 제공 API 키가 있으면 사용, 없으면 기본 키 사용
-        API_KEY = api_key if api_key else ad_userkey_list[0]
-        SECRET_KEY = secret_key if secret_key else ad_userkey_list[1]
-        CUSTOMER_ID = customer_id if customer_id else ad_userkey_list[2]
-
-        uri = '/keywordstool'
-        method = 'GET'
-
-        params={}
-        params['hintKeywords']=hintKeywords
-        params['showDetail']='1'
-
-        r=requests.get(BASE_URL + uri, params=params,
-                     headers= self.get_header(method, uri, API_KEY, SECRET_KEY, CUSTOMER_ID))
-
-        # 응답 확인
-        response_data = r.json()
-        print(f"[DEBUG] API 응답 상태: {r.status_code}")
-        print(f"[DEBUG] API 응답 키: {response_data.keys()}")
-
-        if 'keywordList' not in response_data:
-            print(f"[ERROR] API 응답 전체: {response_data}")
-            raise Exception(f"API 오류: {response_data.get('message', '알 수 없는 오류')}")
-
-        return pd.DataFrame(response_data['keywordList'])
+        # 사용자 제공 API 키가 있으면 사용, 없으면 등록된 광고 API 키들을 번갈아 사용
+        if api_key and secret_key and customer_id:
+            return pd.DataFrame(get_keyword_list(hintKeywords, api_key, secret_key, customer_id))
+        return pd.DataFrame(get_keyword_list(hintKeywords, key_pool=ad_key_pool))
 
 # API 키 로드
 def load_api_keys():
@@ -107,7 +71,28 @@ def load_api_keys():
     except FileNotFoundError:
         print("Warning: google_youtube_key.txt not found. Google/YouTube features will be disabled.")
 
+    # 추가 키 (NAVER_..._2, ad_key_2.txt 등)까지 키 풀에 등록
+    ad_key_pool.load([ad_userkey_list] + extra_credentials(
+        ['NAVER_AD_API_KEY', 'NAVER_AD_SECRET_KEY', 'NAVER_CUSTOMER_ID'], 'ad_key'))
+    search_key_pool.load([search_userkey_list] + extra_credentials(
+        ['NAVER_SEARCH_CLIENT_ID', 'NAVER_SEARCH_CLIENT_SECRET'], 'search_key'))
+
+def format_keyword_df(df, extra_columns=()):
+    """keywordstool 결과 DataFrame을 응답 컬럼으로 변환"""
+    df.rename({
+        'relKeyword':'연관키워드',
+        'monthlyPcQcCnt':'모바일검색량',
+        'monthlyMobileQcCnt':'PC검색량',
+        'compIdx':'경쟁강도'
+    }, axis=1, inplace=True)
+
+    df['모바일검색량'] = df['모바일검색량'].apply(lambda x: int(str(x).replace('<', '').strip()))
+    df['PC검색량'] = df['PC검색량'].apply(lambda x: int(str(x).replace('<', '').strip()))
+    df['총검색량'] = df['모바일검색량'] + df['PC검색량']
+    return df[['연관키워드', '모바일검색량','PC검색량','총검색량','경쟁강도'] + list(extra_columns)]
+
 @app.route('/search_keywords', methods=['POST'])
+@with_deadline()
 def search_keywords():
     try:
         data = request.json
@@ -128,17 +113,7 @@ def search_keywords():
         df = signature_obj.getresults(keyword, user_api_key, user_secret_key, user_customer_id)
         print(f"[INFO] 조회된 키워드 수: {len(df)}")
 
-        df.rename({
-            'relKeyword':'연관키워드',
-            'monthlyPcQcCnt':'모바일검색량',
-            'monthlyMobileQcCnt':'PC검색량',
-            'compIdx':'경쟁강도'
-        }, axis=1, inplace=True)
-
-        df['모바일검색량'] = df['모바일검색량'].apply(lambda x: int(str(x).replace('<', '').strip()))
-        df['PC검색량'] = df['PC검색량'].apply(lambda x: int(str(x).replace('<', '').strip()))
-        df['총검색량'] = df['모바일검색량'] + df['PC검색량']
-        df = df[['연관키워드', '모바일검색량','PC검색량','총검색량','경쟁강도']]
+        df = format_keyword_df(df)
 
         return jsonify({
             'success': True,
@@ -149,79 +124,176 @@ def search_keywords():
         print(f"[ERROR] 키워드 검색 실패: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/analyze_competition', methods=['POST'])
-def analyze_competition():
+@app.route('/search_keywords_batch', methods=['POST'])
+@with_deadline()
+def search_keywords_batch():
+    """
+    여러 시드 키워드의 연관 키워드 일괄 조회
+    keywordstool 호출 한 번에 시드 5개씩 묶어서 보내고, 결과는 연관키워드 기준으로 병합
+    """
     try:
         data = request.json
-        keywords_data = data['keywords']
+        seeds = data['keywords']
 
-        # 사용자가 제공한 검색 API 키 (선택사항)
+        # 사용자가 제공한 API 키 (선택사항)
         api_keys = data.get('apiKeys', {})
-        user_client_id = api_keys.get('searchClientId')
-        user_client_secret = api_keys.get('searchClientSecret')
-
-        print(f"[INFO] 경쟁도 분석 요청: {len(keywords_data)}개 키워드")
-        print(f"[INFO] 사용자 검색 API 키 제공: {bool(user_client_id)}")
-
-        df = pd.DataFrame(keywords_data)
-
-        total_values_list = []
-
-        for idx, text in enumerate(df['연관키워드']):
-            try:
-                # 사용자 키가 있으면 사용, 없으면 기본 키 사용
-                client_id = user_client_id if user_client_id else search_userkey_list[0]
-                client_secret = user_client_secret if user_client_secret else search_userkey_list[1]
-
-                encText = urllib.parse.quote(text)
-                url = "https://openapi.naver.com/v1/search/blog?query=" + encText
-
-                req = urllib.request.Request(url)
-                req.add_header("X-Naver-Client-Id", client_id)
-                req.add_header("X-Naver-Client-Secret", client_secret)
-
-                response = urllib.request.urlopen(req)
-                rescode = response.getcode()
-
-                if rescode == 200:
-                    response_body = response.read()
-                    total_num = response_body.decode('utf-8')
-                    total = json.loads(total_num)['total']
-                    total_values_list.append(total)
-                    print(f"[INFO] {text}: 총문서수 {total}")
-                else:
-                    print(f"[WARNING] {text}: API 응답 코드 {rescode}")
-                    total_values_list.append(0)
-
-                # 진행률 업데이트
-                progress_status["current"] = idx + 1
-                progress_status["total"] = len(df)
-                progress_status["message"] = f"{text} 분석 완료"
-
-                time.sleep(0.05)  # API 호출 제한 방지
-            except Exception as e:
-                print(f"[ERROR] {text} 분석 실패: {str(e)}")
-                total_values_list.append(0)
-
-        df['총문서수'] = total_values_list
-        df['경쟁률'] = df['총검색량'] / df['총문서수']
-
-        print(f"[INFO] 경쟁도 분석 완료")
-        print(f"[DEBUG] 첫 번째 데이터: {df.iloc[0].to_dict()}")
-
-        # 엑셀 파일 저장
-        now = datetime.now()
-        filename = f'키워드분석_{now.strftime("%Y%m%d_%H%M%S")}.xlsx'
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(current_dir, filename)
-        df.to_excel(file_path, index=False)
-        print(f"[INFO] 엑셀 파일 저장: {filename}")
+        api_key = api_keys.get('adApiKey')
+        secret_key = api_keys.get('adSecretKey')
+        customer_id = api_keys.get('adCustomerId')
+
+        print(f"[INFO] 일괄 키워드 검색 요청: 시드 {len(seeds)}개")
+
+        # 사용자 키가 없으면 등록된 광고 API 키들을 번갈아 사용
+        if api_key and secret_key and customer_id:
+            rows, errors = get_keyword_list_batch(seeds, api_key, secret_key, customer_id)
+        else:
+            rows, errors = get_keyword_list_batch(seeds, key_pool=ad_key_pool)
+        for group_error in errors:
+            print(f"[ERROR] 키워드 검색 실패 {group_error['seeds']}: {group_error['error']}")
+
+        if not rows:
+            return jsonify({'success': not errors, 'data': [], 'total': 0, 'errors': errors,
+                            'partial': any(error['timedOut'] for error in errors)})
+
+        df = pd.DataFrame(rows).rename({'seeds': '시드키워드'}, axis=1)
+        df = format_keyword_df(df, extra_columns=['시드키워드'])
+        print(f"[INFO] 조회된 키워드 수: {len(df)}")
 
         return jsonify({
             'success': True,
             'data': df.to_dict('records'),
-            'filename': filename
+            'total': len(df),
+            'errors': errors,
+            'partial': any(error['timedOut'] for error in errors)
         })
+    except Exception as e:
+        print(f"[ERROR] 일괄 키워드 검색 실패: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+
+def competition_ratio(total_search, total):
+    """경쟁률 = 총검색량 / 총문서수 (조회 실패는 None, 총문서수 0이면 0)"""
+    if total is None:
+        return None
+    return total_search / total if total > 0 else 0
+
+def run_competition_analysis(job, keywords_data, client_id, client_secret, deadline_seconds=ANALYSIS_DEADLINE,
+                             key_pool=None):
+    """
+    경쟁도 분석 작업 본체 (작업 워커 스레드에서 실행) - (결과, 요약) 반환
+    시작 후 deadline_seconds초가 지나면 남은 키워드는 조회하지 않고 '미완료'로 표시
+    key_pool을 주면 client_id/client_secret 대신 풀의 키를 번갈아 사용
+    """
+    df = pd.DataFrame(keywords_data)
+    job.start(len(df))
+
+    progress_status["current"] = 0
+    progress_status["total"] = len(df)
+    progress_status["message"] = ""
+
+    # 진행률 업데이트 + 부분 결과 전송 (키워드 하나 완료될 때마다)
+    def on_result(idx, result):
+        if result['error']:
+            print(f"[ERROR] {result['keyword']} 분석 실패: {result['error']}")
+        else:
+            print(f"[INFO] {result['keyword']}: 총문서수 {result['total']}")
+        total_search = keywords_data[idx].get('총검색량', 0)
+        row = dict(keywords_data[idx])
+        row['총문서수'] = result['total']
+        row['오류'] = result['error']
+        row['캐시'] = result['cache']
+        row['미완료'] = bool(result.get('timedOut'))
+        # 조회 실패는 0이 아니라 빈 값으로 두고 오류 표시
+        row['경쟁률'] = competition_ratio(total_search, result['total'])
+
+        message = f"{result['keyword']} 분석 완료"
+        progress_status["current"] += 1
+        progress_status["message"] = message
+        job.add_row(idx, row, message)
+
+    # 총문서수 동시 조회
+    with deadline_scope(Deadline(deadline_seconds)):
+        results = lookup_blog_totals(list(df['연관키워드']), client_id, client_secret, on_result=on_result,
+                                     is_cancelled=lambda: job.cancelled, key_pool=key_pool)
+    job.check_cancelled()
+    total_values_list = [result['total'] for result in results]
+
+    df['총문서수'] = pd.Series(total_values_list, index=df.index, dtype=object)
+    df['오류'] = pd.Series([result['error'] for result in results], index=df.index, dtype=object)
+    df['캐시'] = [result['cache'] for result in results]
+    df['미완료'] = [bool(result.get('timedOut')) for result in results]
+    df['경쟁률'] = pd.Series([competition_ratio(total_search, result['total'])
+                           for total_search, result in zip(df['총검색량'], results)], index=df.index, dtype=object)
+
+    print(f"[INFO] 경쟁도 분석 완료 (캐시 적중 {(df['캐시'] == 'hit').sum()}개)")
+    print(f"[DEBUG] 첫 번째 데이터: {df.iloc[0].to_dict()}")
+
+    # 다운로드 파일은 /download 요청 시 생성
+    rows = df.to_dict('records')
+    filename = export_registry.register(rows, job.id)
+
+    summary = {
+        'filename': filename,
+        'count': len(df),
+        'errorCount': int(df['오류'].notna().sum()),
+        'timedOutCount': int(df['미완료'].sum()),
+        'cacheHits': int((df['캐시'] == 'hit').sum())
+    }
+    return {'data': rows, 'filename': filename}, summary
+
+def submit_competition_analysis(data):
+    """경쟁도 분석 작업을 대기열에 제출 (클라이언트가 jobId를 보내면 그 id 사용)"""
+    keywords_data = data['keywords']
+    # 입력 검증은 job을 만들기 전에 (잘못된 요청이 queued 상태 job으로 남지 않도록)
+    if not isinstance(keywords_data, list):
+        raise ValueError('keywords는 목록이어야 합니다.')
+    deadline_seconds = analysis_deadline(data.get('deadline'))
+
+    # 사용자가 제공한 검색 API 키 (선택사항)
+    api_keys = data.get('apiKeys', {})
+    user_client_id = api_keys.get('searchClientId')
+    user_client_secret = api_keys.get('searchClientSecret')
+
+    print(f"[INFO] 경쟁도 분석 요청: {len(keywords_data)}개 키워드")
+    print(f"[INFO] 사용자 검색 API 키 제공: {bool(user_client_id)}")
+
+    job = job_registry.create(data.get('jobId'), total=len(keywords_data))
+
+    # 사용자 키가 있으면 사용, 없으면 등록된 검색 API 키들을 번갈아 사용
+    if user_client_id and user_client_secret:
+        return job_queue.submit(job, run_competition_analysis, keywords_data, user_client_id, user_client_secret,
+                                deadline_seconds)
+    return job_queue.submit(job, run_competition_analysis, keywords_data, None, None, deadline_seconds,
+                            search_key_pool)
+
+@app.route('/analyze_competition', methods=['POST'])
+def analyze_competition():
+    """
+    경쟁도 분석 (동기) - 작업 대기열에 넣고 끝날 때까지 기다렸다가 결과 반환
+    ?stream=ndjson (또는 body의 "stream": true) 이면 키워드가 끝날 때마다 한 줄씩 NDJSON으로 전송
+    """
+    try:
+        job = submit_competition_analysis(request.json)
+
+        if request.args.get('stream') == 'ndjson' or request.json.get('stream'):
+            return Response(stream_with_context(job.ndjson()), mimetype='application/x-ndjson',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+        job.wait()
+
+        if job.status != 'done':
+            return jsonify({'success': False, 'error': job.error or '작업이 취소되었습니다.', 'jobId': job.id})
+
+        return jsonify({
+            'success': True,
+            'data': job.result['data'],
+            'filename': job.result['filename'],
+            'partial': any(row['미완료'] for row in job.result['data']),
+            'jobId': job.id
+        })
+    except QueueFull:
+        return jsonify({'success': False, 'error': '분석 요청이 많습니다. 잠시 후 다시 시도해주세요.'}), 503
+    except JobExists:
+        return jsonify({'success': False, 'error': '이미 사용 중인 jobId입니다.'}), 409
     except Exception as e:
         print(f"[ERROR] 경쟁도 분석 실패: {str(e)}")
         import traceback
@@ -229,16 +301,127 @@ def analyze_competition():
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/jobs/analyze_competition', methods=['POST'])
+def submit_analyze_competition():
+    """경쟁도 분석 (비동기) - job id를 바로 반환, 진행률은 /jobs/<id>, 결과는 /jobs/<id>/result"""
+    try:
+        job = submit_competition_analysis(request.json)
+        return jsonify({'success': True, 'jobId': job.id, 'status': job.status}), 202
+    except QueueFull:
+        return jsonify({'success': False, 'error': '분석 요청이 많습니다. 잠시 후 다시 시도해주세요.'}), 503
+    except JobExists:
+        return jsonify({'success': False, 'error': '이미 사용 중인 jobId입니다.'}), 409
+    except Exception as e:
+        print(f"[ERROR] 경쟁도 분석 제출 실패: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(dict(job.progress(), success=True, queueDepth=job_queue.depth()))
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없거나 결과 보관 기간이 지났습니다.'}), 404
+    if job.status != 'done':
+        return jsonify(dict(job.progress(), success=False)), 409
+    return jsonify(dict(job.result, success=True, jobId=job.id))
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    job.cancel()
+    return jsonify(dict(job.progress(), success=True))
+
+
 @app.route('/progress')
 def get_progress():
     return jsonify(progress_status)
 
 
+@app.route('/progress/<job_id>')
+def get_job_progress(job_id):
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(job.progress())
+
+
+@app.route('/progress/<job_id>/stream')
+def stream_job_progress(job_id):
+    """job 진행률/부분 결과를 Server-Sent Events로 전송"""
+    # 분석 요청보다 스트림 연결이 먼저 올 수 있으므로 job 생성을 잠시 기다림
+    job = job_registry.get(job_id, wait=10)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return Response(stream_with_context(job.stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/cache_stats')
+def get_cache_stats():
+    return jsonify({
+        'blog_total': blog_total_cache.stats(),
+        'keywordstool': keywordstool_cache.stats()
+    })
+
+
+# /metrics 요청 때만 읽는 캐시 적중률
+metrics_registry.register_collector(cache_collector({
+    'blog_total': blog_total_cache.stats,
+    'keywordstool': keywordstool_cache.stats
+}))
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus 텍스트 형식 지표"""
+    return Response(metrics_registry.render(), content_type=CONTENT_TYPE)
+
+
+@app.route('/upstream_stats')
+def get_upstream_stats():
+    return jsonify({
+        'pools': http_client.stats(),
+        'single_flight': single_flight.stats()
+    })
+
+
+@app.route('/admin/breakers')
+def get_breakers():
+    """외부 API 대상별 회로 차단기 상태 (closed / open / half_open)"""
+    return jsonify({'success': True, 'breakers': breakers.stats()})
+
+
+@app.route('/admin/breakers/<name>/reset', methods=['POST'])
+def reset_breaker(name):
+    """회로 차단기를 강제로 closed로 (대상 복구를 확인한 경우)"""
+    breaker = breakers.find(name)
+    if breaker is None:
+        return jsonify({'success': False, 'error': '회로 차단기를 찾을 수 없습니다.'}), 404
+    breaker.reset()
+    return jsonify({'success': True, 'breaker': breaker.stats()})
+
+
 @app.route('/download/<filename>')
 def download_file(filename):
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(current_dir, filename)
-    return send_file(file_path, as_attachment=True)
+    """분석 결과 다운로드 - 확장자를 .csv / .parquet 로 바꾸면 해당 형식으로 생성"""
+    try:
+        path = export_registry.path_for(filename)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if path is None:
+        return jsonify({'success': False, 'error': '파일을 찾을 수 없거나 보관 기간이 지났습니다.'}), 404
+    return send_file(path, as_attachment=True, download_name=filename)
 
 # API 키 로드 (모듈 임포트 시 자동 실행)
 load_api_keys()
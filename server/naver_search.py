@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+네이버 검색 API 호출 모듈
+블로그 총문서수 조회를 스레드 풀로 동시에 처리하고, 조회 결과는 캐시에 보관
+검색 API 장애가 계속되면 회로 차단기가 호출을 막고, 캐시에 남아 있는 마지막 총문서수 사용
+응답이 유난히 느린 호출은 같은 호출을 한 번 더 보내서 먼저 온 응답 사용 (hedge.py, HEDGE_ENABLED=1)
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from breaker import blog_search_breaker
+from cache import TTLCache, normalize_keyword
+from hedge import blog_search_hedger, blog_total_hedger
+from upstream import (DeadlineExceeded, RetryBudget, UpstreamError, bind_deadline, call_with_retry, credential_id,
+                      current_deadline, limited_get, search_api_limiter, single_flight)
+
+BLOG_SEARCH_URL = "https://openapi.naver.com/v1/search/blog"
+
+# 총문서수 동시 조회 스레드 수
+BLOG_LOOKUP_WORKERS = int(os.getenv('BLOG_LOOKUP_WORKERS', '8'))
+
+# 총문서수 캐시 (기본 10000개, 6시간)
+blog_total_cache = TTLCache(
+    maxsize=int(os.getenv('BLOG_TOTAL_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('BLOG_TOTAL_CACHE_TTL', '21600'))
+)
+
+
+def fetch_blog_total(keyword, client_id, client_secret):
+    """블로그 검색 결과의 총문서수(total) 조회 - total만 쓰므로 display=1로 최소 응답 요청"""
+    headers = {
+        'X-Naver-Client-Id': client_id,
+        'X-Naver-Client-Secret': client_secret
+    }
+
+    response = limited_get(search_api_limiter.for_key(client_id), BLOG_SEARCH_URL, hedger=blog_total_hedger,
+                           params={'query': keyword, 'display': 1}, headers=headers)
+
+    if response.status_code != 200:
+        raise UpstreamError(f"API 응답 코드 {response.status_code}", response.status_code)
+
+    return response.json()['total']
+
+
+def lookup_blog_totals(keywords, client_id, client_secret, max_workers=None, on_result=None, is_cancelled=None,
+                       key_pool=None):
+    """
+    여러 키워드의 총문서수를 동시에 조회
+
+    Args:
+        keywords: 키워드 리스트
+        client_id, client_secret: 네이버 검색 API 키
+        max_workers: 동시 조회 스레드 수 (기본 BLOG_LOOKUP_WORKERS, 키 풀을 쓰면 키 수만큼 곱함)
+        on_result: 키워드 하나가 끝날 때마다 호출되는 콜백 (index, result)
+        is_cancelled: True를 반환하면 남은 키워드는 조회하지 않음 (작업 취소용)
+        key_pool: 지정하면 client_id/client_secret 대신 풀의 키를 번갈아 사용
+
+    Returns:
+        입력 순서와 같은 순서의 결과 리스트
+        [{'keyword': ..., 'total': int (실패하면 None), 'error': None 또는 오류 메시지,
+          'cache': 'hit' / 'miss' / 'stale'(조회 실패로 마지막 값 사용)}, ...]
+        요청 마감 시간이 지나서 조회하지 못한 키워드는 'timedOut': True
+    """
+    results = [None] * len(keywords)
+    if not keywords:
+        return results
+
+    if key_pool is not None:
+        credential = key_pool.scope
+
+        def fetch(keyword):
+            return key_pool.call(lambda pool_id, pool_secret: fetch_blog_total(keyword, pool_id, pool_secret))
+    else:
+        credential = credential_id(client_id)
+
+        def fetch(keyword):
+            return fetch_blog_total(keyword, client_id, client_secret)
+
+    deadline = current_deadline()
+
+    def lookup(keyword):
+        if is_cancelled and is_cancelled():
+            return {'keyword': keyword, 'total': None, 'error': '취소됨', 'cache': 'miss'}
+        if deadline is not None and deadline.expired:
+            return timed_out(keyword)
+        try:
+            # 다른 요청이 같은 키워드를 조회 중이면 그 결과를 함께 사용
+            total = single_flight.do(
+                ('blog_total', normalize_keyword(keyword), credential),
+                lambda: call_with_retry(lambda: blog_search_breaker.call(lambda: fetch(keyword)), retry_budget)
+            )
+            blog_total_cache.set(normalize_keyword(keyword), total)
+            return {'keyword': keyword, 'total': total, 'error': None, 'cache': 'miss'}
+        except Exception as e:
+            if isinstance(e, DeadlineExceeded):
+                return timed_out(keyword)
+            # 조회에 실패하면 만료된 캐시 값이라도 마지막으로 받은 총문서수 사용
+            total = blog_total_cache.get_stale(normalize_keyword(keyword))
+            if total is not None:
+                return {'keyword': keyword, 'total': total, 'error': None, 'cache': 'stale'}
+            return {'keyword': keyword, 'total': None, 'error': str(e), 'cache': 'miss'}
+
+    def timed_out(keyword):
+        # 마감 시간 안에 조회하지 못한 키워드 - 만료된 캐시 값이 있으면 사용, 없으면 미완료 표시
+        total = blog_total_cache.get_stale(normalize_keyword(keyword))
+        if total is not None:
+            return {'keyword': keyword, 'total': total, 'error': None, 'cache': 'stale'}
+        return {'keyword': keyword, 'total': None, 'error': '시간 초과', 'cache': 'miss', 'timedOut': True}
+
+    # 캐시에 있는 키워드는 바로 채우고, 나머지만 API 조회
+    pending = []
+    for idx, keyword in enumerate(keywords):
+        total = blog_total_cache.get(normalize_keyword(keyword))
+        if total is None:
+            pending.append(idx)
+            continue
+        results[idx] = {'keyword': keyword, 'total': total, 'error': None, 'cache': 'hit'}
+        if on_result:
+            on_result(idx, results[idx])
+
+    if not pending:
+        return results
+
+    default_workers = BLOG_LOOKUP_WORKERS * max(1, len(key_pool)) if key_pool is not None else BLOG_LOOKUP_WORKERS
+    workers = max(1, min(max_workers or default_workers, len(pending)))
+
+    # 429/일시적 오류 재시도는 이 조회 전체에서 공유하는 횟수 안에서만 (키 풀이면 재시도 때 다른 키 사용)
+    retry_budget = RetryBudget.for_calls(len(pending))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(bind_deadline(lookup), keywords[idx]): idx for idx in pending}
+        for future in as_completed(futures):
+            idx = futures[future]
+            results[idx] = future.result()
+            if on_result:
+                on_result(idx, results[idx])
+
+    return results
+
+
+def search_blog(keyword, client_id, client_secret, display=100, start=1, sort='sim', retry_budget=None):
+    """블로그 검색 결과 items 조회 (순위 확인용, 429/일시적 오류는 재시도)"""
+    headers = {
+        'X-Naver-Client-Id': client_id,
+        'X-Naver-Client-Secret': client_secret
+    }
+    params = {'query': keyword, 'display': display, 'start': start, 'sort': sort}
+
+    def request():
+        response = limited_get(search_api_limiter.for_key(client_id), BLOG_SEARCH_URL, hedger=blog_search_hedger,
+                               params=params, headers=headers, timeout=10)
+        result = response.json()
+
+        if 'items' not in result:
+            print(f"[ERROR] API 응답 오류: {result}")
+            raise UpstreamError('API 응답 오류', response.status_code)
+
+        return result['items']
+
+    return call_with_retry(lambda: blog_search_breaker.call(request), retry_budget)
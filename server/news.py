@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+최신 뉴스(오늘의 글감) 피드 모듈
+- 뉴스 검색 결과를 메모리에 보관해서 /latest_news 요청은 메모리만 읽음
+- 보관한 지 NEWS_CACHE_TTL초가 지나면 이전 목록을 바로 반환하고 백그라운드에서 갱신
+- 갱신할 때는 새 기사(처음 보는 링크)만 제목을 정리해서 앞에 붙이고, 최근 NEWS_WINDOW개만 유지
+- 제목의 <b> 태그/HTML 엔티티는 BeautifulSoup 대신 미리 컴파일한 정규식 + html.unescape로 제거
+"""
+import html
+import os
+import re
+import threading
+import time
+
+from breaker import news_search_breaker
+from upstream import UpstreamError, call_with_retry, limited_get, search_api_limiter
+
+NEWS_SEARCH_URL = "https://openapi.naver.com/v1/search/news.json"
+NEWS_QUERY = "경제 OR 정책 OR IT OR 트렌드"
+
+# 목록을 신선하다고 보는 시간(초)
+NEWS_CACHE_TTL = float(os.getenv('NEWS_CACHE_TTL', '60'))
+
+# 보관하는 최근 기사 수, 한 번에 받아오는 기사 수
+NEWS_WINDOW = int(os.getenv('NEWS_WINDOW', '50'))
+NEWS_FETCH_SIZE = int(os.getenv('NEWS_FETCH_SIZE', '20'))
+
+_TAG_RE = re.compile(r'<[^>]*>')
+
+
+def strip_tags(text):
+    """HTML 태그 제거 + 엔티티(&quot; 등) 복원"""
+    return html.unescape(_TAG_RE.sub('', text))
+
+
+def fetch_news_items(client_id, client_secret, display=NEWS_FETCH_SIZE):
+    """뉴스 검색 API 최신순 결과 (429/일시적 오류는 재시도, 그래도 실패하면 예외)"""
+    headers = {
+        'X-Naver-Client-Id': client_id,
+        'X-Naver-Client-Secret': client_secret
+    }
+    params = {'query': NEWS_QUERY, 'display': display, 'sort': 'date'}
+
+    def request():
+        response = limited_get(search_api_limiter.for_key(client_id), NEWS_SEARCH_URL, params=params,
+                               headers=headers)
+        if response.status_code != 200:
+            raise UpstreamError(f'네이버 뉴스 API 오류: {response.status_code}', response.status_code)
+        return response.json().get('items', [])
+
+    return call_with_retry(lambda: news_search_breaker.call(request))
+
+
+class NewsFeed:
+    """
+    최신 뉴스 rolling window (스레드 안전)
+    get(loader)의 loader는 인자 없이 뉴스 검색 결과 items를 반환하는 함수
+    """
+
+    def __init__(self, ttl=NEWS_CACHE_TTL, window=NEWS_WINDOW):
+        self.ttl = ttl
+        self.window = window
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0, 'added': 0}
+        self._items = []
+        self._links = set()
+        self._updated_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def merge(self, items):
+        """처음 보는 링크의 기사만 정리해서 앞에 추가 - 추가한 수 반환"""
+        with self._lock:
+            known = set(self._links)
+
+        fresh = []
+        for item in items:
+            link = item.get('link', '')
+            if link in known:
+                # 최신순 결과라 이미 본 기사부터는 모두 이전에 받은 기사
+                break
+            known.add(link)
+            fresh.append({
+                'keyword': strip_tags(item.get('title', '')),
+                'source': 'naver_news',
+                'link': link,
+                'pubDate': item.get('pubDate', '')
+            })
+
+        with self._lock:
+            self._items = [news for news in fresh if news['link'] not in self._links] + self._items
+            del self._items[self.window:]
+            self._links = {news['link'] for news in self._items}
+            self._updated_at = time.monotonic()
+            self.stats['added'] += len(fresh)
+        return len(fresh)
+
+    def refresh(self, loader):
+        self.merge(loader())
+        with self._lock:
+            self.stats['refreshes'] += 1
+
+    def _background_refresh(self, loader):
+        try:
+            self.refresh(loader)
+        except Exception as e:
+            with self._lock:
+                self.stats['refresh_errors'] += 1
+            print(f"[WARNING] 최신 뉴스 백그라운드 갱신 실패 (이전 목록 유지): {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self, loader, limit=10):
+        """최근 기사 limit개 (rank 포함) - 비어 있으면 그 자리에서 불러옴"""
+        with self._lock:
+            age = None if self._updated_at is None else time.monotonic() - self._updated_at
+            if age is None:
+                self.stats['misses'] += 1
+            elif age < self.ttl:
+                self.stats['hits'] += 1
+            else:
+                self.stats['stale_hits'] += 1
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._background_refresh, args=(loader,), daemon=True).start()
+
+        if age is None:
+            self.refresh(loader)
+
+        with self._lock:
+            items = self._items[:limit]
+        return [dict(news, rank=idx + 1) for idx, news in enumerate(items)]
+
+
+news_feed = NewsFeed()
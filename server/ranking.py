@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+블로그 순위 확인 모듈
+- 검색 결과 링크를 블로그 글 식별자(blogId/logNo)로 색인해서 대상 URL을 O(1)로 찾음
+- 여러 (키워드, URL) 쌍은 키워드별로 묶어서 키워드마다 검색 한 번만 수행
+- 100위 밖은 다음 페이지들을 몇 개씩 동시에 가져오고, 대상을 찾으면 더 가져오지 않음
+"""
+import os
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import normalize_keyword
+from naver_search import search_blog
+from upstream import DeadlineExceeded, bind_deadline
+
+# 키워드별 검색을 동시에 보내는 수 (호출 제한은 검색 API 공용 limiter가 담당)
+RANKING_WORKERS = int(os.getenv('RANKING_WORKERS', '4'))
+
+# 검색 API 한 페이지 최대 결과 수, start 최대값
+PAGE_SIZE = 100
+MAX_START = 1000
+
+# 기본 검색 깊이 - 첫 페이지(100위)만, 더 깊은 검색은 요청의 depth로 지정 (최대 1000)
+RANKING_DEFAULT_DEPTH = int(os.getenv('RANKING_DEFAULT_DEPTH', '100'))
+
+# 첫 페이지 이후 한 번에 동시에 가져오는 페이지 수
+RANKING_PAGE_WAVE = int(os.getenv('RANKING_PAGE_WAVE', '3'))
+
+
+def normalize_url(url):
+    """URL 정규화 (프로토콜, www, 쿼리 제거 + 소문자)"""
+    return url.replace('https://', '').replace('http://', '').replace('www.', '').split('?')[0].lower()
+
+
+def parse_post_id(url):
+    """
+    네이버 블로그 글 URL → 'blogid/logNo' (네이버 블로그 글이 아니면 None)
+    blog.naver.com/{blogId}/{logNo}, m.blog.naver.com/{blogId}/{logNo},
+    blog.naver.com/PostView.naver?blogId=...&logNo=... 형식 지원
+    """
+    if '://' not in url:
+        url = 'https://' + url
+    parts = urllib.parse.urlsplit(url)
+    if not parts.netloc.lower().endswith('blog.naver.com'):
+        return None
+
+    query = urllib.parse.parse_qs(parts.query)
+    if query.get('blogId') and query.get('logNo'):
+        return f"{query['blogId'][0].lower()}/{query['logNo'][0]}"
+
+    segments = [segment for segment in parts.path.split('/') if segment]
+    if len(segments) >= 2 and segments[1].isdigit():
+        return f"{segments[0].lower()}/{segments[1]}"
+    return None
+
+
+class RankIndex:
+    """검색 결과 링크 색인 (글 식별자 → 순위, 정규화 URL → 순위)"""
+
+    def __init__(self, items=(), offset=0):
+        self.by_post = {}
+        self.by_url = {}
+        self.links = []
+        self.add(items, offset)
+
+    def add(self, items, offset=0):
+        for i, item in enumerate(items):
+            rank = offset + i + 1
+            link = item.get('link', '')
+            post_id = parse_post_id(link)
+            normalized = normalize_url(link)
+            if post_id:
+                self.by_post.setdefault(post_id, (rank, link))
+            self.by_url.setdefault(normalized, (rank, link))
+            self.links.append((rank, link, normalized))
+
+    def find(self, target_url):
+        """대상 URL의 (순위, 매칭된 링크) - 없으면 (None, None)"""
+        post_id = parse_post_id(target_url)
+        if post_id:
+            return self.by_post.get(post_id, (None, None))
+
+        normalized_target = normalize_url(target_url)
+        if normalized_target in self.by_url:
+            return self.by_url[normalized_target]
+
+        # 네이버 블로그 글 주소가 아니면 기존 방식(부분 문자열 비교)으로 확인
+        for rank, link, normalized_link in sorted(self.links):
+            if normalized_target in normalized_link or normalized_link in normalized_target:
+                return rank, link
+        return None, None
+
+
+def rank_areas(rank):
+    """
+    블로그 탭 순위 → 영역별 순위
+    상위 10개는 스마트블록, 11-30위는 통합검색 블로그 영역
+    """
+    smartblock_rank = None
+    main_blog_rank = None
+    if rank is not None:
+        if rank <= 10:
+            smartblock_rank = rank
+        elif rank <= 30:
+            main_blog_rank = rank - 10
+
+    return area_ranks(smartblock_rank, main_blog_rank, rank)
+
+
+def area_ranks(smartblock_rank, main_blog_rank, blog_tab_rank):
+    """영역별 순위 응답 형식 (스마트블록 / 통합검색 블로그 / 블로그 탭)"""
+    return {
+        'smartblock': {
+            'found': smartblock_rank is not None,
+            'rank': smartblock_rank,
+            'area': 'smartblock',
+            'areaName': '통합검색-스마트블록'
+        },
+        'mainBlog': {
+            'found': main_blog_rank is not None,
+            'rank': main_blog_rank,
+            'area': 'blog',
+            'areaName': '통합검색-블로그'
+        },
+        'blogTab': {
+            'found': blog_tab_rank is not None,
+            'rank': blog_tab_rank,
+            'area': 'blog_tab',
+            'areaName': '블로그탭'
+        }
+    }
+
+
+def clamp_depth(depth):
+    """요청한 검색 깊이를 1 ~ API 한도(start 1000 + 100개) 사이로 맞춤"""
+    try:
+        depth = int(depth) if depth else RANKING_DEFAULT_DEPTH
+    except (TypeError, ValueError):
+        depth = RANKING_DEFAULT_DEPTH
+    return max(1, min(depth, MAX_START + PAGE_SIZE - 1))
+
+
+def deep_search(keyword, target_urls, client_id, client_secret, depth=None, key_pool=None):
+    """
+    대상 URL들을 찾을 때까지 depth위까지 검색해서 RankIndex 반환
+    첫 페이지(1~100위)를 먼저 보고, 못 찾은 대상이 있으면 다음 페이지들을
+    RANKING_PAGE_WAVE개씩 동시에 가져옴 (대상을 모두 찾거나 결과가 끝나면 중단)
+    뒤 페이지에서 오류가 나거나 요청 마감 시간이 지나면 그때까지 이어서 확인한 순위까지만 담고
+    index.partial = True, index.error = 오류 메시지 (첫 페이지도 못 받았으면 예외 발생)
+    key_pool을 주면 client_id/client_secret 대신 페이지마다 풀의 키를 번갈아 사용
+    """
+    depth = clamp_depth(depth)
+    starts = list(range(1, min(depth, MAX_START) + 1, PAGE_SIZE))
+
+    index = RankIndex()
+    index.depth = 0
+    index.partial = False
+    index.error = None
+
+    def fetch(start):
+        display = min(PAGE_SIZE, depth - start + 1)
+        if key_pool is not None:
+            items = key_pool.call(lambda pool_id, pool_secret: search_blog(keyword, pool_id, pool_secret,
+                                                                           display=display, start=start))
+        else:
+            items = search_blog(keyword, client_id, client_secret, display=display, start=start)
+        return start, display, items
+
+    def all_found():
+        return all(index.find(url)[0] is not None for url in target_urls)
+
+    waves = [starts[:1]] + [starts[i:i + RANKING_PAGE_WAVE] for i in range(1, len(starts), RANKING_PAGE_WAVE)]
+    for wave in waves:
+        if not wave:
+            continue
+        if len(wave) == 1:
+            futures = None
+        else:
+            with ThreadPoolExecutor(max_workers=len(wave)) as executor:
+                futures = [executor.submit(bind_deadline(fetch), start) for start in wave]
+
+        # 실패한 페이지 앞까지만 사용 (순위가 이어지지 않으므로 그 뒤 페이지는 버림)
+        pages = []
+        for i, start in enumerate(wave):
+            try:
+                pages.append(futures[i].result() if futures else fetch(start))
+            except Exception as e:
+                if not index.depth and not pages:
+                    raise
+                index.partial = True
+                index.error = str(e)
+                break
+
+        exhausted = False
+        for start, display, items in pages:
+            index.add(items, offset=start - 1)
+            index.depth = max(index.depth, start - 1 + len(items))
+            if len(items) < display:
+                exhausted = True
+
+        if exhausted or index.partial or all_found():
+            break
+
+    return index
+
+
+def check_rankings_bulk(pairs, client_id, client_secret, max_workers=None, depth=None, key_pool=None):
+    """
+    여러 (키워드, URL) 쌍의 순위를 한 번에 확인
+
+    Args:
+        pairs: [{'keyword': ..., 'targetUrl': ...}, ...]
+        depth: 키워드별 최대 검색 깊이 (기본 RANKING_DEFAULT_DEPTH)
+        key_pool: 지정하면 client_id/client_secret 대신 풀의 키를 번갈아 사용
+
+    Returns:
+        (results, search_count)
+        results: 입력 순서대로 [{'keyword', 'targetUrl', 'matchedLink', 'searchedDepth', 'error', + rank_areas()}, ...]
+        오류/마감 시간 때문에 일부 페이지만 확인했으면 'partial': True (+ 'error'),
+        마감 시간 때문에 하나도 확인하지 못했으면 'timedOut': True
+    """
+    groups = {}
+    for idx, pair in enumerate(pairs):
+        groups.setdefault(normalize_keyword(pair['keyword']), []).append(idx)
+
+    def search(indexes):
+        return deep_search(pairs[indexes[0]]['keyword'], [pairs[idx]['targetUrl'] for idx in indexes],
+                           client_id, client_secret, depth, key_pool)
+
+    results = [None] * len(pairs)
+    if not groups:
+        return results, 0
+
+    workers = max(1, min(max_workers or RANKING_WORKERS, len(groups)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(indexes, executor.submit(bind_deadline(search), indexes)) for indexes in groups.values()]
+
+    for indexes, future in futures:
+        timed_out = False
+        try:
+            index = future.result()
+            error = index.error
+        except Exception as e:
+            index = None
+            error = str(e)
+            timed_out = isinstance(e, DeadlineExceeded)
+
+        for idx in indexes:
+            pair = pairs[idx]
+            rank, link = index.find(pair['targetUrl']) if index else (None, None)
+            results[idx] = dict(rank_areas(rank), keyword=pair['keyword'], targetUrl=pair['targetUrl'],
+                                matchedLink=link, searchedDepth=index.depth if index else 0, error=error,
+                                partial=index.partial if index else False, timedOut=timed_out)
+
+    return results, len(groups)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+블로그 순위 추적 모듈
+- 사용자가 (키워드, URL) 추적 대상을 등록하면 스케줄러가 주기적으로 순위를 확인
+- 확인 시점이 몰리지 않도록 주기에 ±TRACKING_JITTER 비율만큼 무작위 편차를 줌
+- 한 번에 확인하는 대상들은 check_rankings_bulk로 묶어서 같은 키워드는 검색 한 번만 수행
+  (여러 사용자가 같은 키워드를 추적해도 검색은 한 번)
+- 결과는 SQLite 시계열 테이블(rank_history)에 기록하고, (watch_id, checked_at) 인덱스로
+  차트용 이력 조회는 네이버 API 호출 없이 DB에서 바로 응답
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from cache import normalize_keyword
+from ranking import check_rankings_bulk, normalize_url
+
+# 순위 이력 DB 파일
+RANK_DB_PATH = os.getenv('RANK_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rank_history.db'))
+
+# 기본 확인 주기(초)와 최소 주기
+TRACKING_INTERVAL = float(os.getenv('TRACKING_INTERVAL', '21600'))
+TRACKING_MIN_INTERVAL = float(os.getenv('TRACKING_MIN_INTERVAL', '600'))
+
+# 확인 주기에 주는 무작위 편차 비율 (0.1 → ±10%)
+TRACKING_JITTER = float(os.getenv('TRACKING_JITTER', '0.1'))
+
+# 확인할 대상이 있는지 보는 간격(초)과 한 번에 확인하는 최대 대상 수
+TRACKING_TICK = float(os.getenv('TRACKING_TICK', '30'))
+TRACKING_BATCH_SIZE = int(os.getenv('TRACKING_BATCH_SIZE', '200'))
+
+# 이력 조회 기본/최대 건수
+HISTORY_LIMIT = 500
+HISTORY_MAX_LIMIT = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rank_watches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    keyword TEXT NOT NULL,
+    keyword_key TEXT NOT NULL,
+    target_url TEXT NOT NULL,
+    url_key TEXT NOT NULL,
+    interval REAL NOT NULL,
+    created_at REAL NOT NULL,
+    next_check_at REAL NOT NULL,
+    last_checked_at REAL,
+    last_rank INTEGER,
+    UNIQUE (keyword_key, url_key)
+);
+CREATE INDEX IF NOT EXISTS idx_rank_watches_next ON rank_watches (next_check_at);
+CREATE TABLE IF NOT EXISTS rank_history (
+    watch_id INTEGER NOT NULL,
+    checked_at REAL NOT NULL,
+    rank INTEGER,
+    smartblock_rank INTEGER,
+    main_blog_rank INTEGER,
+    searched_depth INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rank_history_watch_time ON rank_history (watch_id, checked_at);
+"""
+
+WATCH_COLUMNS = ('id', 'keyword', 'target_url', 'interval', 'created_at', 'next_check_at', 'last_checked_at',
+                 'last_rank')
+
+
+def _watch_dict(row):
+    watch = dict(zip(WATCH_COLUMNS, row))
+    return {
+        'id': watch['id'],
+        'keyword': watch['keyword'],
+        'targetUrl': watch['target_url'],
+        'interval': watch['interval'],
+        'createdAt': watch['created_at'],
+        'nextCheckAt': watch['next_check_at'],
+        'lastCheckedAt': watch['last_checked_at'],
+        'lastRank': watch['last_rank']
+    }
+
+
+class RankStore:
+    """순위 추적 대상 + 순위 이력 SQLite 저장소 (연결 하나를 잠금으로 공유)"""
+
+    def __init__(self, path=RANK_DB_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def add_watch(self, keyword, target_url, interval=None):
+        """추적 대상 등록 - 같은 (키워드, URL)이 이미 있으면 기존 대상 반환"""
+        interval = max(TRACKING_MIN_INTERVAL, float(interval or TRACKING_INTERVAL))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    'INSERT OR IGNORE INTO rank_watches '
+                    '(keyword, keyword_key, target_url, url_key, interval, created_at, next_check_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (keyword, normalize_keyword(keyword), target_url, normalize_url(target_url), interval, now, now))
+            row = conn.execute(
+                f'SELECT {", ".join(WATCH_COLUMNS)} FROM rank_watches WHERE keyword_key = ? AND url_key = ?',
+                (normalize_keyword(keyword), normalize_url(target_url))).fetchone()
+        return _watch_dict(row)
+
+    def get_watch(self, watch_id):
+        with self._lock:
+            row = self._connect().execute(
+                f'SELECT {", ".join(WATCH_COLUMNS)} FROM rank_watches WHERE id = ?', (watch_id,)).fetchone()
+        return _watch_dict(row) if row else None
+
+    def list_watches(self):
+        with self._lock:
+            rows = self._connect().execute(
+                f'SELECT {", ".join(WATCH_COLUMNS)} FROM rank_watches ORDER BY id').fetchall()
+        return [_watch_dict(row) for row in rows]
+
+    def remove_watch(self, watch_id):
+        """추적 대상과 이력 삭제 - 대상이 없었으면 False"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                deleted = conn.execute('DELETE FROM rank_watches WHERE id = ?', (watch_id,)).rowcount
+                conn.execute('DELETE FROM rank_history WHERE watch_id = ?', (watch_id,))
+        return deleted > 0
+
+    def due_watches(self, now, limit=TRACKING_BATCH_SIZE):
+        """확인할 시점이 된 대상 (오래 기다린 순)"""
+        with self._lock:
+            rows = self._connect().execute(
+                f'SELECT {", ".join(WATCH_COLUMNS)} FROM rank_watches WHERE next_check_at <= ? '
+                'ORDER BY next_check_at LIMIT ?', (now, limit)).fetchall()
+        return [_watch_dict(row) for row in rows]
+
+    def record(self, checks):
+        """
+        확인 결과 기록 (한 트랜잭션)
+        checks: [(watch, checked_at, next_check_at, result), ...]  result는 check_rankings_bulk 결과 항목
+        """
+        history = []
+        updates = []
+        for watch, checked_at, next_check_at, result in checks:
+            rank = result['blogTab']['rank']
+            history.append((watch['id'], checked_at, rank, result['smartblock']['rank'], result['mainBlog']['rank'],
+                            result.get('searchedDepth'), result.get('error')))
+            # 일부 페이지만 확인했어도 찾은 순위는 반영
+            updates.append((next_check_at, checked_at, rank, rank is None and result.get('error') is not None,
+                            watch['id']))
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany('INSERT INTO rank_history VALUES (?, ?, ?, ?, ?, ?, ?)', history)
+                # 실패한 확인은 마지막 순위를 덮어쓰지 않음
+                conn.executemany(
+                    'UPDATE rank_watches SET next_check_at = ?, last_checked_at = ?, '
+                    'last_rank = CASE WHEN ? THEN last_rank ELSE ? END WHERE id = ?',
+                    [(next_at, checked_at, failed, rank, watch_id)
+                     for next_at, checked_at, rank, failed, watch_id in updates])
+
+    def history(self, watch_id, since=None, until=None, limit=HISTORY_LIMIT):
+        """추적 대상의 순위 이력 (시간순, 최근 limit건)"""
+        limit = max(1, min(int(limit or HISTORY_LIMIT), HISTORY_MAX_LIMIT))
+        query = 'SELECT checked_at, rank, smartblock_rank, main_blog_rank, searched_depth, error ' \
+                'FROM rank_history WHERE watch_id = ?'
+        params = [watch_id]
+        if since is not None:
+            query += ' AND checked_at >= ?'
+            params.append(float(since))
+        if until is not None:
+            query += ' AND checked_at <= ?'
+            params.append(float(until))
+        query += ' ORDER BY checked_at DESC LIMIT ?'
+        params.append(limit)
+
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        return [
+            {'checkedAt': checked_at, 'rank': rank, 'smartblockRank': smartblock_rank, 'mainBlogRank': main_blog_rank,
+             'searchedDepth': searched_depth, 'error': error}
+            for checked_at, rank, smartblock_rank, main_blog_rank, searched_depth, error in reversed(rows)
+        ]
+
+
+def next_check_time(now, interval, jitter=TRACKING_JITTER):
+    """다음 확인 시각 - 주기에 ±jitter 비율 편차"""
+    return now + interval * (1 + random.uniform(-jitter, jitter))
+
+
+class RankTracker:
+    """
+    등록된 추적 대상을 주기적으로 확인하는 백그라운드 스케줄러
+    검색은 key_pool(검색 API 키 풀)의 키를 번갈아 사용
+    """
+
+    def __init__(self, store, tick=TRACKING_TICK):
+        self.store = store
+        self.tick = tick
+        self.stats = {'runs': 0, 'checks': 0, 'searches': 0, 'errors': 0, 'lastRunAt': None}
+        self._key_pool = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, key_pool):
+        """백그라운드 확인 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            self._key_pool = key_pool
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name='rank-tracker', daemon=True)
+            self._thread.start()
+        print(f"[INFO] 순위 추적 스케줄러 시작 (확인 간격 {self.tick:.0f}초)")
+
+    def check_now(self):
+        """다음 확인 간격을 기다리지 않고 바로 확인"""
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"[ERROR] 순위 추적 실패: {str(e)}")
+            self._wake.wait(self.tick)
+            self._wake.clear()
+
+    def run_due(self, now=None):
+        """확인할 시점이 된 대상들을 한 번에 확인하고 기록 - 확인한 대상 수 반환"""
+        now = now or time.time()
+        watches = self.store.due_watches(now)
+        if not watches:
+            return 0
+
+        pairs = [{'keyword': watch['keyword'], 'targetUrl': watch['targetUrl']} for watch in watches]
+        results, search_count = check_rankings_bulk(pairs, None, None, key_pool=self._key_pool)
+
+        checked_at = time.time()
+        self.store.record([
+            (watch, checked_at, next_check_time(checked_at, watch['interval']), result)
+            for watch, result in zip(watches, results)
+        ])
+
+        errors = sum(1 for result in results if result.get('error'))
+        with self._lock:
+            self.stats['runs'] += 1
+            self.stats['checks'] += len(watches)
+            self.stats['searches'] += search_count
+            self.stats['errors'] += errors
+            self.stats['lastRunAt'] = checked_at
+        print(f"[INFO] 순위 추적: {len(watches)}건 확인, 검색 {search_count}회, 실패 {errors}건")
+        return len(watches)
+
+
+rank_store = RankStore()
+rank_tracker = RankTracker(rank_store)
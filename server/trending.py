@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*-
+"""
+실시간 인기 검색어 크롤링 모듈
+- 네이버: Signal.bz, 구글: Adsensefarm.kr
+- 헤드리스 Chrome 세션을 미리 띄워두고 재사용 (요청마다 Chrome을 새로 띄우지 않음)
+- 고정 sleep 대신 대상 선택자가 나타날 때까지만 대기
+- 먼저 브라우저 없이 HTML만 받아서 파싱하고, 검색어가 없을 때만 Selenium 사용
+- 백그라운드 스케줄러가 주기적으로 크롤링하고, 요청은 메모리의 최신 스냅샷만 읽음
+- 검색어 요소들의 텍스트/링크가 지난번과 같으면 검색어 추출을 건너뛰고 이전 검색어 재사용
+- 대상 사이트가 계속 실패하면 회로 차단기로 한동안 크롤링을 건너뛰고 마지막으로 성공한 검색어로 응답
+"""
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from breaker import breakers
+from cache import ResultMemo
+from metrics import selenium_session_start_seconds, selenium_session_use_seconds
+from upstream import http_client
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from webdriver_manager.chrome import ChromeDriverManager
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# 미리 띄워두는 Chrome 세션 수 (두 사이트를 동시에 크롤링하므로 기본 2)
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+
+# 세션 하나를 이 횟수만큼 쓰면 종료하고 새로 띄움 (메모리 누수 방지)
+BROWSER_MAX_USES = int(os.getenv('BROWSER_MAX_USES', '50'))
+
+# 대상 선택자를 기다리는 최대 시간(초)
+SCRAPE_TIMEOUT = float(os.getenv('SCRAPE_TIMEOUT', '10'))
+
+# 검색어 요소들의 (텍스트, 링크)가 지난번과 같으면 검색어 추출을 건너뛰고 이전 검색어 재사용
+scrape_memo = ResultMemo(maxsize=20)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+NAVER_SAMPLE_KEYWORDS = ['날씨', '뉴스', '주식', '부동산', '축구', '야구', '환율', '코스피', '프리미어리그', 'K리그']
+GOOGLE_SAMPLE_KEYWORDS = ['ChatGPT', 'AI', '인공지능', 'Python', 'React', '디지털노마드', '재택근무', '부업', '투자', '주식']
+
+
+class BrowserSession:
+    """재사용되는 Chrome 세션 하나"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+
+    def healthy(self):
+        try:
+            return self.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """
+    헤드리스 Chrome 세션 풀
+    - 세션은 필요할 때 만들고, 반납하면 다음 요청이 재사용
+    - 꺼낼 때 상태를 확인해서 죽은 세션은 버리고 새로 띄움
+    - max_uses번 사용한 세션은 반납 시 종료
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_uses=BROWSER_MAX_USES):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.created = 0
+        self.recycled = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._driver_path = None
+        self._lock = threading.Lock()
+
+    def _new_session(self):
+        with self._lock:
+            if self._driver_path is None:
+                # chromedriver 설치 경로는 한 번만 확인
+                self._driver_path = ChromeDriverManager().install()
+
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument(f'user-agent={USER_AGENT}')
+
+        with selenium_session_start_seconds.time():
+            driver = webdriver.Chrome(service=Service(self._driver_path), options=options)
+        driver.set_page_load_timeout(SCRAPE_TIMEOUT * 2)
+        with self._lock:
+            self.created += 1
+        return BrowserSession(driver)
+
+    def acquire(self):
+        """세션 하나를 꺼냄 (풀이 모두 사용 중이면 반납될 때까지 대기)"""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    session = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_session()
+                if session.healthy():
+                    return session
+                session.quit()
+                with self._lock:
+                    self.recycled += 1
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, session, broken=False):
+        """세션 반납 - 오류가 났거나 사용 횟수를 채웠으면 종료"""
+        try:
+            session.uses += 1
+            if broken or session.uses >= self.max_uses:
+                session.quit()
+                with self._lock:
+                    self.recycled += 1
+            else:
+                self._idle.put(session)
+        finally:
+            self._slots.release()
+
+    def run(self, fn):
+        """세션을 빌려서 fn(driver) 실행 후 반납"""
+        session = self.acquire()
+        started = time.perf_counter()
+        try:
+            result = fn(session.driver)
+        except Exception:
+            selenium_session_use_seconds.labels('error').observe(time.perf_counter() - started)
+            self.release(session, broken=True)
+            raise
+        selenium_session_use_seconds.labels('ok').observe(time.perf_counter() - started)
+        self.release(session)
+        return result
+
+    def warm(self):
+        """서버 시작 시 세션을 미리 띄워둠 (첫 요청에서 Chrome 기동 시간을 없앰)"""
+        sessions = []
+        try:
+            for _ in range(self.size):
+                sessions.append(self.acquire())
+        except Exception as e:
+            print(f"[WARNING] Chrome 세션 준비 실패: {str(e)}")
+        for session in sessions:
+            session.uses -= 1  # 준비용 반납은 사용 횟수에 넣지 않음
+            self.release(session)
+        print(f"[INFO] Chrome 세션 {len(sessions)}개 준비 완료")
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'max_uses': self.max_uses,
+            'idle': self._idle.qsize(),
+            'created': self.created,
+            'recycled': self.recycled
+        }
+
+
+browser_pool = BrowserPool()
+
+
+def _wait_for(driver, selector):
+    WebDriverWait(driver, SCRAPE_TIMEOUT).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+    )
+
+
+def _extract_signal_bz(texts):
+    """Signal.bz 순위 요소 텍스트 → 네이버 실시간 검색어"""
+    keywords = []
+    seen_keywords = set()
+
+    for text in texts:
+        text = text.strip()
+
+        # 순위 번호가 아니고, 빈 문자열이 아니며, 적절한 길이의 텍스트만 추출
+        if text and not text.isdigit() and len(text) > 2 and len(text) < 100:
+            # 줄바꿈 처리 (순위와 키워드가 함께 있는 경우)
+            if '\n' in text:
+                parts = text.split('\n')
+                keyword = parts[-1].strip()  # 마지막 부분이 키워드
+            else:
+                keyword = text
+
+            # 중복 제거
+            if keyword not in seen_keywords and not keyword.isdigit():
+                keywords.append({
+                    'keyword': keyword,
+                    'rank': len(keywords) + 1,
+                    'source': 'naver'
+                })
+                seen_keywords.add(keyword)
+
+                if len(keywords) >= 10:
+                    break
+
+    return keywords
+
+
+def _extract_adsensefarm(texts):
+    """Adsensefarm.kr 키워드 링크 텍스트 → 구글 실시간 검색어"""
+    keywords = []
+    for i, text in enumerate(texts):
+        text = text.strip()
+        if text and len(text) < 100:
+            keywords.append({
+                'keyword': text,
+                'rank': i + 1,
+                'source': 'google'
+            })
+
+    return keywords
+
+
+# 크롤링 대상 (source → 사이트 이름, 주소, 검색어 요소 선택자, 추출 함수, 샘플 키워드)
+SOURCES = {
+    'naver': {
+        'site': 'Signal.bz',
+        'url': 'https://www.signal.bz/',
+        'selector': '[class*="rank"]',
+        'extract': _extract_signal_bz,
+        'samples': NAVER_SAMPLE_KEYWORDS
+    },
+    'google': {
+        'site': 'Adsensefarm.kr',
+        'url': 'https://adsensefarm.kr/realtime/',
+        'selector': '#googletrend span.keyword a',
+        'extract': _extract_adsensefarm,
+        'samples': GOOGLE_SAMPLE_KEYWORDS
+    }
+}
+
+# source별로 어떤 경로(http / selenium)로 크롤링했는지 집계
+scrape_stats = {source: {'http': 0, 'selenium': 0, 'failed': 0} for source in SOURCES}
+_stats_lock = threading.Lock()
+
+
+def _count(source, path):
+    with _stats_lock:
+        scrape_stats[source][path] += 1
+
+
+def _soup_href(elem):
+    """요소(또는 요소 안 첫 링크)의 href"""
+    link = elem if elem.name == 'a' else elem.find('a')
+    return link.get('href', '') if link is not None else ''
+
+
+def _scrape_http(source):
+    """
+    브라우저 없이 HTML만 받아서 파싱 (서버에서 렌더링된 페이지면 이걸로 충분)
+    검색어를 찾지 못하면 빈 리스트
+    """
+    config = SOURCES[source]
+    response = http_client.get(config['url'], headers={'User-Agent': USER_AGENT}, timeout=SCRAPE_TIMEOUT)
+    if response.status_code != 200:
+        return []
+
+    soup = BeautifulSoup(response.content, HTML_PARSER)
+    elements = soup.select(config['selector'])
+    texts = [elem.get_text('\n', strip=True) for elem in elements]
+    parts = [f'{text}\t{_soup_href(elem)}' for text, elem in zip(texts, elements)]
+    keywords, _ = scrape_memo.reuse(('http', source), parts, lambda: config['extract'](texts))
+    return keywords
+
+
+def _scrape_selenium(source):
+    """헤드리스 Chrome으로 페이지를 렌더링한 뒤 파싱"""
+    config = SOURCES[source]
+
+    def scrape(driver):
+        driver.get(config['url'])
+        _wait_for(driver, config['selector'])
+
+        elements = driver.find_elements(By.CSS_SELECTOR, config['selector'])
+        texts = [elem.text for elem in elements]
+        parts = [f"{text}\t{elem.get_attribute('href') or ''}" for text, elem in zip(texts, elements)]
+        keywords, _ = scrape_memo.reuse(('selenium', source), parts, lambda: config['extract'](texts))
+        return keywords
+
+    return browser_pool.run(scrape)
+
+
+# 크롤링 대상별 회로 차단기 - 연속 SCRAPE_BREAKER_THRESHOLD회 실패하면 SCRAPE_BREAKER_RESET초 동안 크롤링하지 않음
+SCRAPE_BREAKER_THRESHOLD = int(os.getenv('SCRAPE_BREAKER_THRESHOLD', '2'))
+SCRAPE_BREAKER_RESET = float(os.getenv('SCRAPE_BREAKER_RESET', '1800'))
+
+
+def scrape_source(source):
+    """
+    source('naver' / 'google') 크롤링 - (검색어, 경로) 반환
+    HTTP 빠른 경로를 먼저 시도하고, 검색어가 없을 때만 Selenium 사용
+    둘 다 실패하거나 결과가 없으면 예외 발생 (회로가 열려 있으면 크롤링 없이 바로 CircuitOpen)
+    """
+    breaker = breakers.get(f'scrape:{source}', failure_threshold=SCRAPE_BREAKER_THRESHOLD,
+                           reset_timeout=SCRAPE_BREAKER_RESET)
+    return breaker.call(lambda: _scrape_source(source))
+
+
+def _scrape_source(source):
+    site = SOURCES[source]['site']
+    print(f"[INFO] {site}에서 {source} 실시간 검색어 크롤링 시작...")
+
+    try:
+        keywords = _scrape_http(source)
+    except Exception as e:
+        print(f"[WARNING] {site} HTTP 크롤링 실패, Selenium으로 재시도: {str(e)}")
+        keywords = []
+
+    path = 'http'
+    if not keywords:
+        path = 'selenium'
+        try:
+            if not SELENIUM_AVAILABLE:
+                raise RuntimeError('selenium / webdriver-manager가 설치되어 있지 않습니다.')
+            keywords = _scrape_selenium(source)
+        except Exception:
+            _count(source, 'failed')
+            raise
+
+    if not keywords:
+        _count(source, 'failed')
+        raise RuntimeError(f'{site}에서 검색어를 찾지 못했습니다.')
+
+    _count(source, path)
+    print(f"[INFO] {site}에서 {len(keywords)}개 {source} 검색어 수집 완료 ({path})")
+    return keywords[:10], path
+
+
+def sample_keywords(source):
+    return [{'keyword': kw, 'rank': i+1, 'source': source} for i, kw in enumerate(SOURCES[source]['samples'])]
+
+
+# 두 사이트를 동시에 크롤링하기 위한 스레드 풀
+_scrape_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='trending')
+
+
+# 인기 검색어 갱신 주기(초)
+TRENDING_REFRESH_INTERVAL = float(os.getenv('TRENDING_REFRESH_INTERVAL', '300'))
+
+# 마지막으로 성공한 스냅샷 파일 (재시작 직후 대상이 장애여도 샘플 대신 이전 검색어로 응답)
+TRENDING_SNAPSHOT_PATH = os.getenv('TRENDING_SNAPSHOT_PATH',
+                                   os.path.join(tempfile.gettempdir(), 'trending_snapshot.json'))
+
+
+class TrendingScheduler:
+    """
+    인기 검색어를 주기적으로 크롤링해서 최신 스냅샷을 메모리에 보관
+    - 요청은 크롤링을 기다리지 않고 스냅샷만 읽음
+    - 갱신에 실패하면 마지막으로 성공한 스냅샷을 그대로 유지 (파일에도 저장해서 재시작 후에도 사용)
+    - 한 번도 성공하지 못한 source만 샘플 키워드로 응답 (status: 'fallback')
+    """
+
+    def __init__(self, interval=TRENDING_REFRESH_INTERVAL, snapshot_path=TRENDING_SNAPSHOT_PATH):
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self._snapshots = {
+            source: {'keywords': None, 'updated_at': None, 'last_attempt': None, 'status': 'pending', 'error': None,
+                     'via': None}
+            for source in SOURCES
+        }
+        self._load()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _load(self):
+        """파일에 저장된 마지막 스냅샷 불러오기 (status: 'stale')"""
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for source, snapshot in saved.items():
+            if source in self._snapshots and snapshot.get('keywords'):
+                self._snapshots[source].update(keywords=snapshot['keywords'], updated_at=snapshot.get('updated_at'),
+                                               via=snapshot.get('via'), status='stale')
+
+    def _save(self):
+        with self._lock:
+            saved = {source: {'keywords': snapshot['keywords'], 'updated_at': snapshot['updated_at'],
+                              'via': snapshot['via']}
+                     for source, snapshot in self._snapshots.items() if snapshot['keywords']}
+        try:
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(saved, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"[WARNING] 인기 검색어 스냅샷 저장 실패: {str(e)}")
+
+    def start(self):
+        """백그라운드 갱신 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name='trending-scheduler', daemon=True)
+            self._thread.start()
+        print(f"[INFO] 인기 검색어 스케줄러 시작 (갱신 주기 {self.interval:.0f}초)")
+
+    def _loop(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
+
+    def refresh(self):
+        """모든 source를 동시에 갱신"""
+        futures = {source: _scrape_executor.submit(self._refresh_source, source) for source in SOURCES}
+        for future in futures.values():
+            future.result()
+
+    def _refresh_source(self, source):
+        now = time.time()
+        try:
+            keywords, path = scrape_source(source)
+        except Exception as e:
+            print(f"[ERROR] {SOURCES[source]['site']} 갱신 실패 (이전 스냅샷 유지): {str(e)}")
+            with self._lock:
+                snapshot = self._snapshots[source]
+                snapshot['last_attempt'] = now
+                snapshot['status'] = 'stale' if snapshot['keywords'] else 'error'
+                snapshot['error'] = str(e)
+            return
+
+        with self._lock:
+            self._snapshots[source] = {
+                'keywords': keywords, 'updated_at': now, 'last_attempt': now, 'status': 'ok', 'error': None,
+                'via': path
+            }
+        self._save()
+
+    def snapshot(self):
+        """
+        현재 스냅샷 - {source: keywords}, {source: 상태 정보}
+        상태 정보: status(ok/stale/error/pending/fallback), updatedAt, age(초), error, via(http/selenium)
+        """
+        now = time.time()
+        keywords = {}
+        sources = {}
+        with self._lock:
+            for source, snapshot in self._snapshots.items():
+                if snapshot['keywords']:
+                    keywords[source] = snapshot['keywords']
+                    status = snapshot['status']
+                else:
+                    keywords[source] = sample_keywords(source)
+                    status = 'fallback'
+                updated_at = snapshot['updated_at']
+                sources[source] = {
+                    'status': status,
+                    'updatedAt': datetime.fromtimestamp(updated_at).isoformat() if updated_at else None,
+                    'age': round(now - updated_at, 1) if updated_at else None,
+                    'error': snapshot['error'],
+                    'via': snapshot['via']
+                }
+        return keywords, sources
+
+
+trending_scheduler = TrendingScheduler()
@@ -0,0 +1,604 @@
+# -*- coding: utf-8 -*-
+"""
+외부 API(네이버 광고/검색 API) 호출 공통 모듈
+호출 제한(rate limit, 429에 맞춰 속도 조절), 재시도, 호스트별 keep-alive 연결 풀, 동일 요청 합치기(single-flight),
+요청 단위 마감 시간(deadline) 등
+naver_api.py / naver_keyword_api.py 가 함께 쓰는 기능
+"""
+import functools
+import hashlib
+import os
+import random
+import socket
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from metrics import upstream_errors, upstream_request_seconds
+
+
+# upstream 호출 기본 타임아웃(초) - timeout을 따로 주지 않은 호출에도 적용
+UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT', '10'))
+
+# API 요청 하나에 주는 전체 시간(초) - 그 안의 모든 upstream 호출이 이 마감 시간을 넘지 않음
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE', '30'))
+
+
+class Deadline:
+    """요청 하나의 마감 시각 (seconds초 후)"""
+
+    def __init__(self, seconds):
+        self.seconds = float(seconds)
+        self.expires_at = time.monotonic() + self.seconds
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def cancel(self):
+        """지금 바로 만료 (이후 upstream 호출은 하지 않음)"""
+        self.expires_at = time.monotonic()
+
+
+_deadline_local = threading.local()
+
+
+def current_deadline():
+    """지금 스레드에서 처리 중인 요청의 마감 시간 (없으면 None)"""
+    return getattr(_deadline_local, 'deadline', None)
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """with 블록 안의 upstream 호출에 마감 시간 적용"""
+    previous = current_deadline()
+    _deadline_local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _deadline_local.deadline = previous
+
+
+def bind_deadline(fn):
+    """지금 스레드의 마감 시간을 다른 스레드(스레드 풀)에서도 쓰도록 fn을 감쌈"""
+    deadline = current_deadline()
+    if deadline is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with deadline_scope(deadline):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def with_deadline(seconds=REQUEST_DEADLINE):
+    """함수(라우트) 실행 동안 seconds초 마감 시간을 적용하는 데코레이터"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with deadline_scope(Deadline(seconds)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def check_deadline():
+    """마감 시간이 지났으면 DeadlineExceeded"""
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded(f'요청 시간({deadline.seconds:.0f}초)을 초과했습니다.')
+
+
+class TokenBucket:
+    """
+    토큰 버킷 방식 호출 제한
+    초당 rate개씩 토큰이 채워지고, 최대 capacity개까지 한 번에 호출 가능
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self.waits = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 대기"""
+        waited = False
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+                deadline = current_deadline()
+                if deadline is not None and deadline.remaining() < wait:
+                    raise DeadlineExceeded('호출 제한 대기 중 요청 시간을 초과했습니다.')
+                if not waited:
+                    self.waits += 1
+                    waited = True
+            time.sleep(wait)
+
+
+# 성공 한 번에 다시 올리는 속도 (최대 속도 대비 비율)
+ADAPTIVE_STEP = float(os.getenv('ADAPTIVE_STEP', '0.05'))
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    응답에 맞춰 속도를 조절하는 토큰 버킷
+    429를 받으면 속도를 절반으로 줄이고(초당 한 번까지만, min_rate 아래로는 안 내려감),
+    성공할 때마다 최대 속도의 ADAPTIVE_STEP 비율만큼 다시 올림
+    """
+
+    def __init__(self, rate, min_rate=None):
+        super().__init__(rate)
+        self.max_rate = self.rate
+        self.min_rate = float(min_rate) if min_rate else self.max_rate * 0.1
+        self.throttles = 0
+        self._last_decrease = 0.0
+
+    def on_success(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.max_rate * ADAPTIVE_STEP)
+
+    def on_throttle(self):
+        with self._lock:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= 1.0:
+                self._refill()
+                self.rate = max(self.min_rate, self.rate / 2)
+                # 남은 토큰도 비워서 바로 속도를 낮춤
+                self._tokens = 0.0
+                self._last_decrease = now
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': round(self.rate, 3),
+                'max_rate': self.max_rate,
+                'throttles': self.throttles,
+                'waits': self.waits
+            }
+
+
+class KeyedLimiter:
+    """API 키마다 따로 AdaptiveTokenBucket을 두는 호출 제한 (키를 늘리면 처리량도 늘어남)"""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def for_key(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = AdaptiveTokenBucket(self.rate)
+            return bucket
+
+    def acquire(self, key, tokens=1):
+        self.for_key(key).acquire(tokens)
+
+    def stats(self):
+        """키별 현재 속도 / 429 횟수 / 대기 횟수 (키는 식별자로만 표시)"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {credential_id(key): bucket.stats() for key, bucket in buckets.items()}
+
+
+# 네이버 검색 API 호출 제한 (검색 API 키마다, 기본 초당 10회 - 블로그/뉴스 검색 공용)
+search_api_limiter = KeyedLimiter(float(os.getenv('NAVER_SEARCH_QPS', '10')))
+
+# 네이버 광고 API(keywordstool) 호출 제한 (광고 API 키마다, 기본 초당 10회)
+ad_api_limiter = KeyedLimiter(float(os.getenv('NAVER_AD_QPS', '10')))
+
+
+class UpstreamError(Exception):
+    """외부 API 오류 응답 (status: HTTP 상태 코드, 알 수 없으면 None)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class DeadlineExceeded(UpstreamError):
+    """요청의 마감 시간이 지나서 upstream 호출을 하지 않음 (또는 중단함)"""
+
+
+# 재시도할 HTTP 상태 코드 (429: 호출 제한, 5xx: 일시적인 서버 오류)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 호출 하나당 최대 시도 횟수, 재시도 대기 시간(초, 시도마다 두 배 + 무작위 편차)
+UPSTREAM_MAX_ATTEMPTS = int(os.getenv('UPSTREAM_MAX_ATTEMPTS', '3'))
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '8'))
+
+# 요청 하나(분석 작업 하나)에서 쓸 수 있는 재시도 횟수 = 기본값 + 호출 수 x 비율
+REQUEST_RETRY_BUDGET = int(os.getenv('REQUEST_RETRY_BUDGET', '3'))
+RETRY_BUDGET_RATIO = float(os.getenv('RETRY_BUDGET_RATIO', '0.1'))
+
+retry_stats = {'retries': 0, 'budget_exhausted': 0, 'gave_up': 0}
+_retry_lock = threading.Lock()
+
+
+def _count_retry(name):
+    with _retry_lock:
+        retry_stats[name] += 1
+
+
+class RetryBudget:
+    """요청 하나에서 공유하는 재시도 횟수 (스레드 안전)"""
+
+    def __init__(self, retries=REQUEST_RETRY_BUDGET):
+        self.remaining = int(retries)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_calls(cls, calls):
+        return cls(REQUEST_RETRY_BUDGET + int(calls * RETRY_BUDGET_RATIO))
+
+    def take(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def is_retryable(error):
+    return getattr(error, 'status', None) in RETRY_STATUSES or isinstance(error, requests.RequestException)
+
+
+def call_with_retry(fn, budget=None, attempts=UPSTREAM_MAX_ATTEMPTS):
+    """
+    fn()을 실행하고, 일시적인 오류(429, 5xx, 연결 오류)면 대기 후 재시도
+    대기 시간은 시도마다 두 배 + 무작위 편차, 재시도는 budget을 다 쓰면 더 하지 않음
+    """
+    budget = budget or RetryBudget()
+    attempt = 1
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if attempt >= attempts:
+                _count_retry('gave_up')
+                raise
+            if not budget.take():
+                _count_retry('budget_exhausted')
+                raise
+            delay = random.uniform(0.5, 1) * min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            deadline = current_deadline()
+            if deadline is not None and deadline.remaining() < delay:
+                raise
+            _count_retry('retries')
+            time.sleep(delay)
+            attempt += 1
+
+
+class CallAborted(UpstreamError):
+    """다른 스레드가 진행 중인 호출을 끊음 (중복 호출이 먼저 응답한 경우 등)"""
+
+
+class CallHandle:
+    """
+    진행 중인 HTTP 호출 하나를 다른 스레드에서 끊기 위한 핸들
+    call_scope(handle) 안에서 연결 풀에서 꺼낸 연결을 기억해 두었다가 abort()하면 소켓을 닫음
+    연결이 풀로 돌아가거나 call_scope가 끝나면 잊어버림 (다른 요청이 쓰는 연결을 닫지 않도록)
+    """
+
+    def __init__(self):
+        self.aborted = False
+        self.done = False
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def attach(self, conn):
+        with self._lock:
+            self._conn = conn
+
+    def detach(self, conn):
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+
+    def finish(self):
+        with self._lock:
+            self.done = True
+            self._conn = None
+
+    def abort(self):
+        """호출이 아직 진행 중이면 연결을 끊음 (이미 끝났으면 아무것도 하지 않음)"""
+        with self._lock:
+            if self.done:
+                return
+            self.aborted = True
+            sock = getattr(self._conn, 'sock', None)
+            if sock is not None:
+                # 잠금을 잡은 채로 닫아서 그 사이에 연결이 풀로 돌아가 다른 요청에 쓰이지 않도록
+                try:
+                    # 응답을 기다리며 막혀 있는 recv가 바로 끝나도록
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+_call_local = threading.local()
+
+
+@contextmanager
+def call_scope(handle):
+    """with 블록 안의 HTTP 호출을 handle.abort()로 끊을 수 있게 함"""
+    previous = getattr(_call_local, 'handle', None)
+    _call_local.handle = handle
+    try:
+        yield handle
+    finally:
+        handle.finish()
+        _call_local.handle = previous
+
+
+class _HandlePoolMixin:
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        handle = getattr(_call_local, 'handle', None)
+        if handle is not None:
+            conn.call_handle = handle
+            handle.attach(conn)
+        return conn
+
+    def _put_conn(self, conn):
+        # 풀로 돌려주기 전에 핸들에서 떼어냄 (돌려준 뒤에는 다른 요청이 꺼내 쓸 수 있음)
+        handle = getattr(conn, 'call_handle', None)
+        if handle is not None:
+            conn.call_handle = None
+            handle.detach(conn)
+        super()._put_conn(conn)
+
+
+class _HandleHTTPConnectionPool(_HandlePoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _HandleHTTPSConnectionPool(_HandlePoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _HandleAdapter(HTTPAdapter):
+    """꺼낸 연결을 현재 CallHandle에 알려주는 연결 풀 어댑터"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _HandleHTTPConnectionPool,
+                                                   'https': _HandleHTTPSConnectionPool}
+
+
+class UpstreamClient:
+    """
+    호스트별 keep-alive 연결 풀을 가진 HTTP 클라이언트
+    요청/스레드 간에 세션을 재사용해서 매 호출마다 TCP+TLS 연결을 새로 맺지 않음
+
+    Args:
+        pool_size: 호스트당 최대 연결 수
+    """
+
+    def __init__(self, pool_size):
+        self.pool_size = int(pool_size)
+        self._sessions = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def session(self, host):
+        """호스트 전용 세션 (없으면 생성)"""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = _HandleAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+                self._counts[host] = {'requests': 0, 'errors': 0}
+            return session
+
+    def request(self, method, url, **kwargs):
+        """
+        요청 - timeout은 (지정값 또는 UPSTREAM_TIMEOUT)과 요청 마감까지 남은 시간 중 짧은 쪽
+        마감 시간이 이미 지났으면 호출하지 않고 DeadlineExceeded
+        """
+        check_deadline()
+        deadline = current_deadline()
+        timeout = kwargs.pop('timeout', None) or UPSTREAM_TIMEOUT
+        limited = deadline is not None and deadline.remaining() < timeout
+        if limited:
+            timeout = max(0.001, deadline.remaining())
+
+        host = urllib.parse.urlsplit(url).netloc
+        session = self.session(host)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.Timeout as e:
+            with self._lock:
+                self._counts[host]['requests'] += 1
+                self._counts[host]['errors'] += 1
+            upstream_request_seconds.labels(host).observe(time.perf_counter() - started)
+            upstream_errors.labels(host, 'timeout').inc()
+            if limited:
+                # upstream 문제가 아니라 요청 마감 때문에 끊긴 경우
+                raise DeadlineExceeded('요청 시간을 초과했습니다.') from e
+            raise
+        except Exception as e:
+            handle = getattr(_call_local, 'handle', None)
+            if handle is not None and handle.aborted:
+                # 호출하는 쪽이 끊은 것 - upstream 오류로 세지 않음
+                with self._lock:
+                    self._counts[host]['requests'] += 1
+                raise CallAborted('호출이 취소되었습니다.') from e
+            with self._lock:
+                self._counts[host]['requests'] += 1
+                self._counts[host]['errors'] += 1
+            upstream_request_seconds.labels(host).observe(time.perf_counter() - started)
+            upstream_errors.labels(host, 'connection').inc()
+            raise
+        with self._lock:
+            self._counts[host]['requests'] += 1
+        upstream_request_seconds.labels(host).observe(time.perf_counter() - started)
+        if response.status_code == 429:
+            upstream_errors.labels(host, '429').inc()
+        elif response.status_code >= 500:
+            upstream_errors.labels(host, '5xx').inc()
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def stats(self):
+        """호스트별 연결 풀 통계 (새로 맺은 연결 수, 유휴 연결 수, 연결 재사용률)"""
+        with self._lock:
+            sessions = dict(self._sessions)
+            counts = {host: dict(count) for host, count in self._counts.items()}
+
+        result = {}
+        for host, session in sessions.items():
+            opened = 0
+            idle = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    opened += pool.num_connections
+                    if pool.pool:
+                        idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            count = counts.get(host, {'requests': 0, 'errors': 0})
+            result[host] = {
+                'pool_size': self.pool_size,
+                'requests': count['requests'],
+                'errors': count['errors'],
+                'connections_opened': opened,
+                'idle_connections': idle,
+                'reuse_ratio': round(1 - opened / count['requests'], 4) if count['requests'] else 0
+            }
+        return result
+
+
+# 네이버 API 공용 HTTP 클라이언트 (호스트당 기본 16개 연결)
+http_client = UpstreamClient(int(os.getenv('UPSTREAM_POOL_SIZE', '16')))
+
+
+def limited_get(limiter, url, hedger=None, **kwargs):
+    """
+    호출 제한을 지켜서 GET - 429면 limiter 속도를 낮추고, 성공하면 다시 올림
+    hedger를 주면 응답이 늦을 때 중복 호출 (중복 호출도 limiter를 거침)
+    """
+    limiter.acquire()
+    if hedger is not None:
+        response = hedger.call(lambda: http_client.get(url, **kwargs), prepare=limiter.acquire)
+    else:
+        response = http_client.get(url, **kwargs)
+    if response.status_code == 429:
+        limiter.on_throttle()
+    elif response.status_code < 500:
+        limiter.on_success()
+    return response
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합침
+    먼저 들어온 호출만 실제로 실행하고, 나머지는 그 결과(또는 예외)를 함께 받음
+    기다리는 쪽도 자기 요청의 마감 시간까지만 기다림 (먼저 들어온 호출의 마감 시간이 더 길 수 있음)
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            self.calls += 1
+            call = self._inflight.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._inflight[key] = call
+                leader = True
+
+        if not leader:
+            deadline = current_deadline()
+            if not call.done.wait(max(0.0, deadline.remaining()) if deadline is not None else None):
+                with self._lock:
+                    call.waiters -= 1
+                raise DeadlineExceeded('같은 요청의 결과를 기다리는 중 요청 시간을 초과했습니다.')
+            if isinstance(call.error, DeadlineExceeded) and deadline is not None and not deadline.expired:
+                # 먼저 들어온 호출이 자기 마감 시간에 걸린 것 - 남은 시간으로 다시 시도
+                return self.do(key, fn)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def stats(self):
+        """합쳐진 호출 통계 (saved: 실제 호출 없이 결과를 공유받은 횟수)"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'upstream_calls': self.calls - self.shared,
+                'saved': self.shared,
+                'inflight': len(self._inflight)
+            }
+
+
+def credential_id(*parts):
+    """캐시/합치기 키용 API 키 식별자 (키 원문은 키에 남기지 않음)"""
+    return hashlib.sha256(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:16]
+
+
+# 동일 upstream 호출 합치기 (키: (엔드포인트, 키워드, API 키 식별자))
+single_flight = SingleFlight()
@@ -41,7 +41,62 @@ export async function searchNaverKeywords(keyword: string): Promise<NaverKeyword
   }
 }
 
-export async function analyzeNaverCompetition(keywords: NaverKeywordData[]): Promise<{ data: NaverKeywordData[]; filename: string }> {
+export interface AnalysisProgress {
+  jobId: string;
+  status: string;
+  current: number;
+  total: number;
+  message: string;
+  error: string | null;
+}
+
+// 분석 job의 진행률/부분 결과를 Server-Sent Events로 구독 (반환값: 구독 해제 함수)
+export function subscribeAnalysisProgress(
+  jobId: string,
+  onProgress: (progress: AnalysisProgress) => void,
+  onRow?: (index: number, row: NaverKeywordData) => void
+): () => void {
+  const source = new EventSource(`${FLASK_API_URL}/progress/${jobId}/stream`);
+
+  source.addEventListener('progress', (event) => {
+    onProgress(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener('row', (event) => {
+    const { index, row } = JSON.parse((event as MessageEvent).data);
+    onRow?.(index, row);
+  });
+  const close = () => source.close();
+  source.addEventListener('done', (event) => {
+    onProgress(JSON.parse((event as MessageEvent).data));
+    close();
+  });
+  source.addEventListener('failed', (event) => {
+    onProgress(JSON.parse((event as MessageEvent).data));
+    close();
+  });
+  source.addEventListener('cancelled', (event) => {
+    onProgress(JSON.parse((event as MessageEvent).data));
+    close();
+  });
+  source.onerror = close;
+
+  return close;
+}
+
+// crypto.randomUUID는 https(보안 컨텍스트)에서만 있으므로 없으면 getRandomValues로 생성
+function newJobId(): string {
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID().replace(/-/g, '');
+  }
+  return Array.from(crypto.getRandomValues(new Uint8Array(16)), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+export async function analyzeNaverCompetition(
+  keywords: NaverKeywordData[],
+  onProgress?: (progress: AnalysisProgress) => void,
+  onRow?: (index: number, row: NaverKeywordData) => void
+): Promise<{ data: NaverKeywordData[]; filename: string }> {
+  let unsubscribe: (() => void) | undefined;
   try {
     console.log('[DEBUG] API 요청:', `${FLASK_API_URL}/analyze_competition`);
     console.log('[DEBUG] 요청 키워드 수:', keywords.length);
@@ -57,6 +112,12 @@ export async function analyzeNaverCompetition(keywords: NaverKeywordData[]): Pro
       throw new Error('⚠️ 네이버 검색 API 키가 필요합니다.\n\n"API 키 입력" 버튼을 클릭하여 다음 정보를 입력해주세요:\n- Client ID\n- Client Secret');
     }
 
+    // 진행률 구독용 job id (서버는 이 id로 job을 만듦, 구독하지 않으면 서버가 id를 정함)
+    const jobId = onProgress ? newJobId() : undefined;
+    if (jobId && onProgress) {
+      unsubscribe = subscribeAnalysisProgress(jobId, onProgress, onRow);
+    }
+
     const response = await fetch(`${FLASK_API_URL}/analyze_competition`, {
       method: 'POST',
       headers: {
@@ -64,6 +125,7 @@ export async function analyzeNaverCompetition(keywords: NaverKeywordData[]): Pro
       },
       body: JSON.stringify({
         keywords,
+        jobId,
         apiKeys // 사용자의 API 키 전달
       }),
     });
@@ -95,16 +157,8 @@ export async function analyzeNaverCompetition(keywords: NaverKeywordData[]): Pro
       throw error;
     }
     throw new Error('네이버 경쟁 분석 중 오류가 발생했습니다.');
-  }
-}
-
-export async function getAnalysisProgress(): Promise<{ current: number; total: number; message: string }> {
-  try {
-    const response = await fetch(`${FLASK_API_URL}/progress`);
-    return await response.json();
-  } catch (error) {
-    console.error('진행률 조회 오류:', error);
-    return { current: 0, total: 0, message: '' };
+  } finally {
+    unsubscribe?.();
   }
 }
 